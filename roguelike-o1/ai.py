@@ -0,0 +1,100 @@
+"""Systemy AI i ruchu potworów: intencje ruchu i ruch liczone dla wszystkich potworów w jednym przebiegu"""
+
+from array import array
+
+from ecs import System
+from pathfinding import UNREACHED
+from spatial import EMPTY
+from tables import TABLES
+from tilemap import Tile
+
+# Potwór goni gracza, gdy kwadrat odległości jest mniejszy niż ta wartość
+CHASE_DISTANCE_SQ = 9
+
+
+class AISystem(System):
+    """Move intents of all monsters: the dx, dy, steps and chase columns of game.monsters.
+
+    Only monsters inside the player's field of view start a chase. Chasing
+    monsters take their direction from the flow field at every step, so
+    their dx, dy stay 0. Random draws happen in the same order as in
+    benchmarks.PerMonsterGame.move_monster called monster by monster, so a
+    seeded run gives identical results.
+    """
+
+    name = "ai"
+    reads = ("level", "position", "player")
+    writes = ("intent", "flow", "fov", "rng.ai")
+
+    def run(self, game) -> None:
+        monsters, player = game.monsters, game.player
+        player_x, player_y = player.x, player.y
+        xs, ys = monsters.x, monsters.y
+        chasing = [(player_x - x) ** 2 + (player_y - y) ** 2 < CHASE_DISTANCE_SQ for x, y in zip(xs, ys)]
+        if any(chasing):
+            # Mapę odległości i pole widzenia liczymy tylko wtedy, gdy ktoś w ogóle jest blisko gracza
+            flow, fov = game.flow, game.fov
+            flow.update(player_x, player_y)
+            fov.update(player_x, player_y)
+            width, distances, visible = flow.width, flow.distances, fov.visible
+            chasing = [
+                near and distances[index] != UNREACHED and index in visible
+                for near, index in zip(chasing, (y * width + x for x, y in zip(xs, ys)))
+            ]
+        randrange = game.rng.ai.randrange
+        speeds = TABLES.monsters.speed
+        # Intencje zbierane w listach i wpisywane do kolumn w całości - szybciej niż zapis element po elemencie
+        intent_dx, intent_dy, steps = [], [], []
+        for near, kind in zip(chasing, monsters.kind):
+            if near:
+                intent_dx.append(0)
+                intent_dy.append(0)
+            else:
+                intent_dx.append(randrange(3) - 1)
+                intent_dy.append(randrange(3) - 1)
+            speed = speeds[kind]
+            steps.append(randrange(speed + 1) if speed else 0)
+        monsters.dx[:] = array("b", intent_dx)
+        monsters.dy[:] = array("b", intent_dy)
+        monsters.steps[:] = array("b", steps)
+        monsters.chase[:] = array("b", chasing)
+
+
+class MovementSystem(System):
+    """Carries out the move intents in the order of the monster rows - the first one takes a contested cell"""
+
+    name = "movement"
+    reads = ("level", "intent", "flow")
+    writes = ("position", "occupancy")
+
+    def run(self, game) -> None:
+        width, height = game.width, game.height
+        tiles = game.map.tiles
+        cells = game.occupancy.cells
+        next_step = game.flow.next_step
+        monsters = game.monsters
+        xs, ys, ids = monsters.x, monsters.y, monsters.ids
+        wall, empty = int(Tile.WALL), EMPTY  # Zwykłe int w zmiennych lokalnych - porównania w pętli są najczęstsze
+        intents = zip(monsters.steps, monsters.dx, monsters.dy, monsters.chase)
+        for index, (count, dx, dy, chasing) in enumerate(intents):
+            if not count or not chasing and dx == dy == 0:
+                continue
+            x, y = xs[index], ys[index]
+            for _ in range(count):
+                if chasing:
+                    # Pościg: kierunek z mapy odległości, sprawdzany na każdym kroku
+                    direction = next_step(x, y)
+                    if direction is None:
+                        break
+                    dx, dy = direction
+                new_x, new_y = x + dx, y + dy
+                if not (0 <= new_x < width and 0 <= new_y < height):
+                    break
+                target = new_y * width + new_x
+                # Przeszkoda się nie ruszy w trakcie ruchu tego potwora, więc kolejne kroki też by się nie udały
+                if tiles[target] == wall or cells[target] != empty:
+                    break
+                cells[y * width + x] = empty
+                cells[target] = ids[index]
+                x, y = new_x, new_y
+            xs[index], ys[index] = x, y
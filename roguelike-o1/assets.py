@@ -0,0 +1,141 @@
+"""Atlas sprite'ów: wszystkie obrazki w jednej teksturze, zapisanej na dysku i wczytywanej przy pierwszym rysowaniu"""
+
+import hashlib
+import os
+import struct
+from collections.abc import Mapping
+
+import pygame
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images")
+# Identyfikator sprite'a to jego pozycja w atlasie; nazwy są zarazem nazwami plików PNG (poza FLIPPED)
+SPRITES = (
+    "floor",
+    "wall",
+    "chest",
+    "stairs_down",
+    "stairs_up",
+    "player",
+    "goblin",
+    "troll",
+    "dragon",
+    "potion",
+    "sword",
+    "spear",
+    "axe",
+    "shield",
+    "boots",
+    "helmet",
+)
+SPRITE_IDS = {name: index for index, name in enumerate(SPRITES)}
+# Sprite'y bez własnego pliku: odbicie w pionie obrazka o podanej nazwie
+FLIPPED = {"stairs_up": "stairs_down"}
+
+MAGIC = b"RGAT"
+VERSION = 1
+HEADER = struct.Struct("<4sBHH32s")  # magic, wersja, rozmiar kafelka, liczba sprite'ów, skrót plików źródłowych
+
+
+def cache_path(tile_size: int) -> str:
+    return os.path.join(IMAGES_DIR, f".atlas-{tile_size}.bin")
+
+
+def sources_digest(tile_size: int) -> bytes:
+    """Skrót nazw, rozmiarów i czasów modyfikacji PNG - zmiana dowolnego pliku unieważnia atlas"""
+    digest = hashlib.sha256(f"{VERSION}/{tile_size}".encode())
+    for name in SPRITES:
+        stat = os.stat(os.path.join(IMAGES_DIR, f"{FLIPPED.get(name, name)}.png"))
+        digest.update(f"/{name}/{stat.st_size}/{stat.st_mtime_ns}".encode())
+    return digest.digest()
+
+
+def build_atlas(tile_size: int) -> bytes:
+    """Piksele RGBA atlasu: sprite'y w jednym rzędzie, każdy przycięty albo przeskalowany do tile_size x tile_size.
+
+    Images larger than a tile are cropped to their top-left tile, which is
+    what the renderer showed when it blitted them clipped to the cell.
+    Pixels are copied as bytes, so alpha is kept exactly (no blending).
+    """
+    tiles = []
+    for name in SPRITES:
+        image = pygame.image.load(os.path.join(IMAGES_DIR, f"{FLIPPED.get(name, name)}.png"))
+        if image.get_width() < tile_size or image.get_height() < tile_size:
+            image = pygame.transform.smoothscale(image, (tile_size, tile_size))
+        else:
+            image = image.subsurface((0, 0, tile_size, tile_size))
+        if name in FLIPPED:
+            image = pygame.transform.flip(image, False, True)
+        tiles.append(pygame.image.tobytes(image, "RGBA"))
+    row = 4 * tile_size
+    return b"".join(tile[y * row : (y + 1) * row] for y in range(tile_size) for tile in tiles)
+
+
+def save_atlas(pixels: bytes, tile_size: int, path: str) -> None:
+    header = HEADER.pack(MAGIC, VERSION, tile_size, len(SPRITES), sources_digest(tile_size))
+    with open(path, "wb") as file:
+        file.write(header + pixels)
+
+
+def read_atlas(tile_size: int, path: str) -> bytes | None:
+    """Piksele atlasu z pliku albo None, gdy go nie ma lub jest nieaktualny"""
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
+    if len(data) != HEADER.size + 4 * tile_size * tile_size * len(SPRITES):
+        return None
+    magic, version, size, count, digest = HEADER.unpack_from(data)
+    if (magic, version, size, count) != (MAGIC, VERSION, tile_size, len(SPRITES)):
+        return None
+    if digest != sources_digest(tile_size):
+        return None
+    return data[HEADER.size :]
+
+
+def load_atlas(tile_size: int, path: str | None = None) -> pygame.Surface:
+    """Atlas z pamięci podręcznej na dysku, a gdy jej brak - zbudowany z PNG i zapisany"""
+    path = path or cache_path(tile_size)
+    pixels = read_atlas(tile_size, path)
+    if pixels is None:
+        pixels = build_atlas(tile_size)
+        try:
+            save_atlas(pixels, tile_size, path)
+        except OSError:
+            pass  # Katalog tylko do odczytu - atlas zostanie zbudowany przy następnym starcie
+    atlas = pygame.image.frombytes(pixels, (tile_size * len(SPRITES), tile_size), "RGBA")
+    if pygame.display.get_surface() is not None:
+        atlas = atlas.convert_alpha()
+    return atlas
+
+
+class SpriteAtlas(Mapping):
+    """Sprite surfaces by name, backed by one atlas surface loaded on first access.
+
+    Each sprite is a subsurface of the atlas, so lookups return ready
+    tile-sized surfaces without copying pixels.
+    """
+
+    def __init__(self, tile_size: int, path: str | None = None):
+        self.tile_size = tile_size
+        self.path = path
+        self.atlas: pygame.Surface | None = None
+        self.sprites: list[pygame.Surface] | None = None
+
+    def load(self) -> list[pygame.Surface]:
+        size = self.tile_size
+        atlas = self.atlas = load_atlas(size, self.path)
+        self.sprites = [atlas.subsurface((index * size, 0, size, size)) for index in range(len(SPRITES))]
+        return self.sprites
+
+    def __getitem__(self, name: str) -> pygame.Surface:
+        sprites = self.sprites
+        if sprites is None:
+            sprites = self.load()
+        return sprites[SPRITE_IDS[name]]
+
+    def __iter__(self):
+        return iter(SPRITES)
+
+    def __len__(self) -> int:
+        return len(SPRITES)
@@ -0,0 +1,262 @@
+"""Symulacje Monte Carlo balansu gry: wiele gier bez okna rozgrywanych na wszystkich rdzeniach"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter, deque
+
+from dungeon import GENERATORS
+from engine import DEFAULT_GENERATOR, MAP_HEIGHT, MAP_WIDTH, MAX_DUNGEON_LEVELS, MAX_MONSTERS, Action, GameCore
+from tables import TABLES
+from tilemap import Tile
+
+ACTIONS = list(Action)
+MOVES = [Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT]
+MOVE_DELTAS = [(0, -1), (0, 1), (-1, 0), (1, 0)]  # W kolejności MOVES
+
+
+class RandomPolicy:
+    """Uniformly random actions, no inventory use"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def __call__(self, game: GameCore) -> Action:
+        return self.rng.choice(ACTIONS)
+
+
+class WanderPolicy(RandomPolicy):
+    """Fights adjacent monsters, drinks potions when hurt, equips loot, otherwise wanders randomly"""
+
+    def __call__(self, game: GameCore) -> Action:
+        self.manage_inventory(game)
+        if game.adjacent_monsters():
+            return Action.ATTACK
+        return self.move(game)
+
+    def manage_inventory(self, game: GameCore) -> None:
+        player = game.player
+        potions = [item for item in player.inventory if item.category == "potion"]
+        if potions and player.hp < player.max_hp // 2:
+            game.use_item(potions[0])
+        elif len(player.inventory) and not player.inventory[0].equipped and player.inventory[0].category != "potion":
+            game.use_item(player.inventory[0])
+
+    def move(self, game: GameCore) -> Action:
+        return self.rng.choice(MOVES)
+
+
+class DescendPolicy(WanderPolicy):
+    """Like WanderPolicy, but walks the shortest path to the stairs instead of wandering"""
+
+    def __init__(self, rng: random.Random):
+        super().__init__(rng)
+        self.level: int | None = None
+        self.distances: list[int] = []  # Odległości do schodów na poziomie self.level
+
+    def move(self, game: GameCore) -> Action:
+        if game.level != self.level:
+            self.level = game.level
+            self.distances = stairs_distances(game)
+        width, distances = game.width, self.distances
+        player = game.player
+        best, action = distances[player.y * width + player.x], None
+        for move, (dx, dy) in zip(MOVES, MOVE_DELTAS):
+            distance = distances[(player.y + dy) * width + player.x + dx]
+            if distance < best:
+                best, action = distance, move
+        # Drogę zastawia potwór albo schody są nieosiągalne - krok losowy
+        return action if action is not None else self.rng.choice(MOVES)
+
+
+def stairs_distances(game: GameCore) -> list:
+    """Odległości (4-sąsiedztwo, tak jak chodzi gracz) od schodów do każdego pola mapy"""
+    width, tiles = game.width, game.map.tiles
+    unreached = len(tiles)
+    distances = [unreached] * len(tiles)
+    x, y = game.stairs_down
+    start = y * width + x
+    distances[start] = 0
+    queue = deque([start])
+    while queue:
+        index = queue.popleft()
+        for offset in (-width, width, -1, 1):
+            neighbour = index + offset
+            if distances[neighbour] == unreached and tiles[neighbour] != Tile.WALL:
+                distances[neighbour] = distances[index] + 1
+                queue.append(neighbour)
+    return distances
+
+
+POLICIES = {"random": RandomPolicy, "wander": WanderPolicy, "descend": DescendPolicy}
+
+
+class StatsGame(GameCore):
+    """GameCore recording balance statistics: turns to kill each monster and the player's progress per stage"""
+
+    def __init__(self, **kwargs):
+        self.first_hit = {}  # uid potwora -> tura pierwszego ataku gracza
+        self.kills = {}  # rodzaj potwora -> [zabitych, suma tur do zabicia]
+        self.stages = []  # (poziom lochu, tura, doświadczenie, poziom gracza) przy wejściu na poziom
+        super().__init__(**kwargs)
+
+    def enter_level(self) -> None:
+        self.first_hit.clear()
+        self.stages.append((self.level, self.steps, self.player.exp, self.player.level))
+
+    def attack(self):
+        adjacent = self.adjacent_monsters()
+        if adjacent:
+            target = adjacent[0]
+            self.first_hit.setdefault(target.uid, self.steps)
+        super().attack()
+        if adjacent and target.hp <= 0:
+            kills = self.kills.setdefault(target.kind, [0, 0])
+            kills[0] += 1
+            kills[1] += self.steps - self.first_hit.pop(target.uid) + 1
+
+
+def play(task: tuple) -> dict:
+    """Rozegraj jedną grę (zadanie dla procesu roboczego) i zwróć jej statystyki"""
+    seed, policy_name, max_steps, game_options = task
+    game = StatsGame(seed=seed, **game_options)
+    # Ziarno polityki zależy tylko od ziarna gry, nie od procesu, który ją rozgrywa
+    policy = POLICIES[policy_name](random.Random(f"{seed}/policy"))
+    while not game.done and game.steps < max_steps:
+        game.step(policy(game))
+    game.close()
+    return {
+        "seed": seed,
+        "won": game.won,
+        "dead": game.dead,
+        "stage": game.level,
+        "steps": game.steps,
+        "exp": game.player.exp,
+        "player_level": game.player.level,
+        "kills": game.kills,
+        "stages": game.stages,
+    }
+
+
+class BalanceStats:
+    """Aggregates game results as they arrive from the workers"""
+
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.deaths = 0
+        self.steps = 0
+        self.death_stages = Counter()
+        self.kills = {}  # rodzaj -> [zabitych, suma tur do zabicia]
+        self.stages = {}  # poziom lochu -> [gier, suma tur, suma doświadczenia, suma poziomów gracza]
+
+    def add(self, result: dict) -> None:
+        self.games += 1
+        self.wins += result["won"]
+        self.deaths += result["dead"]
+        self.steps += result["steps"]
+        if result["dead"]:
+            self.death_stages[result["stage"]] += 1
+        for kind, (count, turns) in result["kills"].items():
+            kills = self.kills.setdefault(kind, [0, 0])
+            kills[0] += count
+            kills[1] += turns
+        for stage, steps, exp, player_level in result["stages"]:
+            totals = self.stages.setdefault(stage, [0, 0, 0, 0])
+            totals[0] += 1
+            totals[1] += steps
+            totals[2] += exp
+            totals[3] += player_level
+
+    def progress(self) -> str:
+        """Jedna linia z bieżącymi wynikami"""
+        games = max(self.games, 1)
+        return (
+            f"{self.games} games: win {self.wins / games:.1%}, death {self.deaths / games:.1%},"
+            f" {self.steps / games:.0f} turns/game"
+        )
+
+    def report(self) -> str:
+        games = max(self.games, 1)
+        lines = [self.progress(), "", f"{'stage':>5} {'reached':>8} {'deaths':>7} {'turn':>7} {'exp':>8} {'level':>6}"]
+        for stage in sorted(self.stages):
+            reached, steps, exp, player_level = self.stages[stage]
+            lines.append(
+                f"{stage:>5} {reached / games:>8.1%} {self.death_stages[stage] / games:>7.1%}"
+                f" {steps / reached:>7.0f} {exp / reached:>8.1f} {player_level / reached:>6.2f}"
+            )
+        lines += ["", f"{'monster':>10} {'kills':>8} {'turns to kill':>14}"]
+        for kind in sorted(self.kills):
+            count, turns = self.kills[kind]
+            lines.append(f"{TABLES.monsters.names[kind]:>10} {count:>8} {turns / count:>14.2f}")
+        return "\n".join(lines)
+
+
+def run(games: int, workers: int, policy: str, seed: int, max_steps: int, report_every: int = 0, **game_options):
+    """Rozegraj games gier na workers procesach; zwraca (BalanceStats, czas w sekundach)"""
+    tasks = [(seed + index, policy, max_steps, game_options) for index in range(games)]
+    stats = BalanceStats()
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        chunksize = max(1, games // (workers * 16))
+        for result in pool.imap_unordered(play, tasks, chunksize):
+            stats.add(result)
+            if report_every and stats.games % report_every == 0:
+                print(f"[{time.perf_counter() - start:7.1f}s] {stats.progress()}", flush=True)
+    return stats, time.perf_counter() - start
+
+
+def worker_counts(limit: int) -> list:
+    """1, 2, 4, ... aż do limit (zawsze z limit włącznie)"""
+    counts = []
+    count = 1
+    while count < limit:
+        counts.append(count)
+        count *= 2
+    return counts + [limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--policy", choices=list(POLICIES), default="descend")
+    parser.add_argument("--seed", type=int, default=0, help="Ziarno pierwszej gry; kolejne gry mają kolejne ziarna")
+    parser.add_argument("--max-steps", type=int, default=5000, help="Gra przerwana po tylu turach")
+    parser.add_argument("--report-every", type=int, default=100, help="Co ile gier wypisać bieżące wyniki")
+    parser.add_argument("--width", type=int, default=MAP_WIDTH)
+    parser.add_argument("--height", type=int, default=MAP_HEIGHT)
+    parser.add_argument("--max-monsters", type=int, default=MAX_MONSTERS)
+    parser.add_argument("--generator", choices=list(GENERATORS), default=DEFAULT_GENERATOR)
+    parser.add_argument("--scaling", action="store_true", help="Porównaj gry/s dla 1, 2, 4, ... procesów")
+    args = parser.parse_args()
+
+    game_options = {
+        "width": args.width,
+        "height": args.height,
+        "max_monsters": args.max_monsters,
+        "generator": args.generator,
+    }
+    if args.scaling:
+        print(f"{'workers':>7} {'games/s':>9} {'speedup':>8} {'efficiency':>11}")
+        baseline = None
+        for workers in worker_counts(args.workers):
+            _, elapsed = run(args.games, workers, args.policy, args.seed, args.max_steps, **game_options)
+            rate = args.games / elapsed
+            baseline = baseline or rate
+            print(f"{workers:>7} {rate:>9.1f} {rate / baseline:>8.2f} {rate / baseline / workers:>11.1%}")
+        return
+
+    print(f"{args.games} games, policy {args.policy}, {args.workers} workers, {MAX_DUNGEON_LEVELS} stages")
+    stats, elapsed = run(
+        args.games, args.workers, args.policy, args.seed, args.max_steps, args.report_every, **game_options
+    )
+    print()
+    print(stats.report())
+    print(f"\n{elapsed:.2f}s, {args.games / elapsed:.1f} games/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1247 @@
+"""Benchmarki wydajności gry - uruchamiane bez okna pygame"""
+
+import argparse
+import dataclasses
+import functools
+import hashlib
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from assets import FLIPPED, IMAGES_DIR, SPRITES, SpriteAtlas
+from balance import WanderPolicy, worker_counts
+from dungeon import GENERATORS, get_generator
+from ecs import Scheduler, System
+from engine import MAX_DUNGEON_LEVELS, NUM_CHESTS, NUM_MONSTERS, Action, GameCore, Item, LevelLayout, Monsters
+from fov import FOV_RADIUS, FieldOfView
+from inventory import Inventory
+from levels import TIERS, LevelStore
+from offscreen import FRAMES_PER_TASK, render_log
+from pathfinding import FLOW_RADIUS, UNREACHED, FlowField, astar_next_step
+from profiler import Profiler
+from replay import InputLog, replay
+from rng import RandomStreams
+from savegame import dumps, load_game, loads, save_game
+from tables import TABLES
+from tilemap import Tile
+from vecenv import USE_ITEM, VectorEnv
+
+ACTIONS = list(Action)
+# Docelowe zużycie CPU gry czekającej na klawisz (ułamek jednego rdzenia).
+# Sterownik "dummy" SDL nie ma budzenia, więc pygame.event.wait() sprawdza kolejkę co 1 ms.
+IDLE_CPU_TARGET = 0.05
+# Docelowy czas przeliczenia pola widzenia (promień FOV_RADIUS) w ms
+FOV_TARGET_MS = 1.0
+# Systemy ruchu potworów: AI i ruch oraz dawny ruch jeden po drugim (PerMonsterSystem)
+MONSTER_SYSTEMS = ("ai", "movement", "per_monster")
+# Wyniki odniesienia zestawu "suite"; przekroczenie o więcej niż tolerancję to regresja
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+SUITE_REPEATS = 9
+SUITE_MIN_CASES = 5  # Przypadki z odniesieniem potrzebne do wyliczenia szybkości maszyny (machine_factor)
+SUITE_TOLERANCE = 0.2  # Dopuszczalny wzrost mediany czasu względem odniesienia (po uwzględnieniu machine_factor)
+# Przypadki trwające ułamek µs albo jednorazowe mają większy rozrzut median między przebiegami
+SUITE_TOLERANCES = {
+    "get_random_floor_position/crowded": 0.25,
+    "get_random_floor_position/crowded_rebuild": 0.25,
+    "is_occupied/10000": 0.25,
+    "combat/attack": 0.25,
+}
+
+
+def bench_headless(steps: int, seed: int) -> dict:
+    """Steps/sec of the headless core driven by a random policy"""
+    random.seed(seed)
+    game = GameCore()
+    games = 1
+    start = time.perf_counter()
+    for _ in range(steps):
+        state = game.step(random.choice(ACTIONS))
+        if state.done:
+            game = GameCore()
+            games += 1
+    elapsed = time.perf_counter() - start
+    return {"steps": steps, "games": games, "seconds": elapsed, "steps_per_sec": steps / elapsed}
+
+
+def record_session(steps: int, seed: int, **game_options) -> InputLog:
+    """Log of one game played by balance.WanderPolicy - a replayable workload"""
+    policy = WanderPolicy(random.Random(seed))
+    game = GameCore(seed=seed, **game_options)
+    game.log = InputLog.for_game(game)
+    while game.steps < steps and not game.done:
+        game.step(policy(game))
+    return game.log
+
+
+class DigestWriter:
+    """Frame writer that only hashes the frames, so that renders can be compared"""
+
+    def __init__(self):
+        self.digest = hashlib.sha256()
+
+    def write(self, frame: bytes) -> None:
+        self.digest.update(frame)
+
+    def close(self) -> None:
+        pass
+
+
+def bench_frames(log: InputLog, workers: list, frames_per_task: int) -> list:
+    """Off-screen frames/sec of rendering every turn of the log, for each number of worker processes"""
+    results = []
+    for count in workers:
+        writer = DigestWriter()
+        result = render_log(log, writer, count, frames_per_task)
+        results.append({**result, "workers": count, "digest": writer.digest.hexdigest()})
+    return results
+
+
+def bench_replay(log: InputLog, repeats: int) -> dict:
+    """Replay a recorded session several times: steps/sec and whether every run ends in the same state"""
+    times = []
+    states = set()
+    for _ in range(repeats):
+        start = time.perf_counter()
+        game = replay(log)
+        times.append(time.perf_counter() - start)
+        states.add(dataclasses.astuple(game.state()))
+    best = min(times)
+    return {"steps": game.steps, "best_s": best, "steps_per_sec": game.steps / best, "deterministic": len(states) == 1}
+
+
+def bench_vecenv(count: int, steps: int, size: int, seed: int) -> dict:
+    """Env steps/sec of VectorEnv with K games and the share of time spent writing observations"""
+    rng = random.Random(seed)
+    # Ruchy, atak i użycie dwóch najlepszych przedmiotów; akcje losowane przed pomiarem
+    actions = [[rng.randrange(USE_ITEM + 2) for _ in range(count)] for _ in range(steps)]
+    env = VectorEnv(count, width=size, height=size)
+    env.reset(seed)
+    start = time.perf_counter()
+    for row in actions:
+        env.step(row)
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(steps):
+        for index in range(count):
+            env.observe(index)
+    observe = time.perf_counter() - start
+    env.close()
+    return {"steps_per_sec": count * steps / elapsed, "observe_share": observe / elapsed}
+
+
+class PrefetchingGame(GameCore):
+    prefetch_levels = True
+
+
+def level_signature(game: GameCore) -> tuple:
+    """Wszystko, co wyznacza poziom: mapa, skrzynie, potwory, schody i miejsce gracza"""
+    monsters = tuple((m.x, m.y, m.kind, m.hp, m.uid) for m in game.monsters)
+    chests = tuple((position, str(item)) for position, item in game.chests.items())
+    player = (game.player.x, game.player.y)
+    return bytes(game.map.tiles), chests, monsters, game.stairs_down, player, game.level_rng.getstate()
+
+
+def bench_descend(game_class, size: int, generator: str, levels: int, play_ms: float, seed: int) -> dict:
+    """Latency of descending the stairs (GameCore.generate_level) with play_ms of waiting for input per level"""
+    game = game_class(width=size, height=size, generator=generator, seed=seed)
+    times, signatures = [], [level_signature(game)]
+    for _ in range(levels):
+        time.sleep(play_ms / 1000)  # Gracz myśli - pętla zdarzeń czeka, nie trzymając GIL
+        start = time.perf_counter()
+        game.level += 1
+        game.generate_level()
+        times.append(time.perf_counter() - start)
+        signatures.append(level_signature(game))
+    game.close()
+    times.sort()
+    return {
+        "mean_ms": 1000 * sum(times) / len(times),
+        "p50_ms": 1000 * times[len(times) // 2],
+        "max_ms": 1000 * times[-1],
+        "signatures": signatures,
+    }
+
+
+def bench_levels(size: int, generator: str, levels: int, resident: int, budget: int, seed: int) -> dict:
+    """Level swap latency and memory of a persistent dungeon: down to levels, back up to 1 and down again.
+
+    A level is intact when it comes back from the store exactly as the
+    player left it (map, chests, monsters, stairs).
+    """
+    game = GameCore(width=size, height=size, generator=generator, seed=seed, levels=LevelStore(resident, budget))
+    left = {}
+    times: dict[str, list[float]] = {"new": [], "revisit": []}
+    intact = True
+    for level in (*range(2, levels + 1), *range(levels - 1, 0, -1), *range(2, levels + 1)):
+        game.fov.update(game.player.x, game.player.y)
+        left[game.level] = level_signature(game)[:4]
+        start = time.perf_counter()
+        game.change_level(level)
+        times["revisit" if level in left else "new"].append(time.perf_counter() - start)
+        intact = intact and (level not in left or level_signature(game)[:4] == left[level])
+    results = {f"{kind}_ms": 1000 * sum(values) / len(values) for kind, values in times.items()}
+    return {**results, "intact": intact, "store": game.levels.summary()}
+
+
+def bench_snapshot(size: int, generator: str, forks: int, seed: int) -> dict:
+    """Forks/sec of GameCore.snapshot() vs copy.deepcopy, and save/load time of the same game"""
+    import copy
+    import tempfile
+
+    game = GameCore(width=size, height=size, generator=generator, seed=seed)
+    for _ in range(50):
+        game.step(random.Random(seed).choice(ACTIONS))
+    results = {}
+    start = time.perf_counter()
+    for _ in range(forks):
+        game.snapshot()
+    results["snapshot_per_sec"] = forks / (time.perf_counter() - start)
+    deep_forks = max(forks // 100, 1)
+    start = time.perf_counter()
+    for _ in range(deep_forks):
+        copy.deepcopy(game)
+    results["deepcopy_per_sec"] = deep_forks / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    data = dumps(game)
+    results["dumps_ms"] = 1000 * (time.perf_counter() - start)
+    results["bytes"] = len(data)
+    start = time.perf_counter()
+    loads(data)
+    results["loads_ms"] = 1000 * (time.perf_counter() - start)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "game.sav")
+        save_game(game, path)
+        start = time.perf_counter()
+        load_game(path)
+        results["load_file_ms"] = 1000 * (time.perf_counter() - start)
+    return results
+
+
+class PerMonsterSystem(System):
+    """Dawny ruch potworów jeden po drugim (move_monster) - punkt odniesienia dla AISystem i MovementSystem"""
+
+    name = "per_monster"
+    reads = ("level", "player")
+    writes = ("position", "occupancy", "flow", "fov", "rng.ai")
+
+    def run(self, game) -> None:
+        for monster in game.monsters:
+            game.move_monster(monster)
+
+
+class PerMonsterGame(GameCore):
+    """Tura z PerMonsterSystem w miejscu systemów AI i ruchu"""
+
+    systems = tuple(
+        PerMonsterSystem() if system.name == "ai" else system
+        for system in GameCore.systems
+        if system.name != "movement"
+    )
+
+    def move_monster(self, monster):
+        """Ruch pojedynczego potwora - wzorcowa wersja dla AISystem i MovementSystem"""
+        # Oblicz odległość euklidesową
+        dx = self.player.x - monster.x
+        dy = self.player.y - monster.y
+        dist_sq = dx * dx + dy * dy
+
+        chasing = False
+        if dist_sq < 9:
+            # Goni tylko potwór, którego gracz widzi i do którego prowadzi droga
+            self.flow.update(self.player.x, self.player.y)
+            self.fov.update(self.player.x, self.player.y)
+            reachable = self.flow.distance(monster.x, monster.y) != UNREACHED
+            chasing = reachable and self.fov.is_visible(monster.x, monster.y)
+        if chasing:
+            # Poruszaj się w kierunku gracza, omijając ściany
+            target_dx = target_dy = 0
+        else:
+            # Poruszaj się losowo
+            target_dx = self.rng.ai.choice([-1, 0, 1])
+            target_dy = self.rng.ai.choice([-1, 0, 1])
+
+        speed = TABLES.monsters.speed[monster.kind]
+        move_choice = self.rng.ai.randrange(speed + 1) if speed else 0
+
+        for _ in range(move_choice):
+            if chasing:
+                direction = self.flow.next_step(monster.x, monster.y)
+                if direction is None:
+                    break
+                target_dx, target_dy = direction
+            new_x = monster.x + target_dx
+            new_y = monster.y + target_dy
+            if (
+                0 <= new_x < self.width
+                and 0 <= new_y < self.height
+                and not self.map.is_wall(new_x, new_y)
+                and not self.is_occupied(new_x, new_y)
+            ):
+                self.occupancy.move(monster, new_x, new_y)
+
+
+class LinearScanGame(PerMonsterGame):
+    """Dawne liniowe przeszukiwanie listy potworów - punkt odniesienia dla indeksu zajętości"""
+
+    def is_occupied(self, x, y):
+        if self.player.x == x and self.player.y == y:
+            return True
+        for other in self.monsters:
+            if other.x == x and other.y == y:
+                return True
+        return False
+
+    def adjacent_monsters(self) -> list:
+        return [
+            monster
+            for monster in self.monsters
+            if abs(monster.x - self.player.x) <= 1 and abs(monster.y - self.player.y) <= 1
+        ]
+
+
+def bench_turn(game_class, monsters: int, turns: int, seed: int) -> float:
+    """Mean ms per monster turn with the given number of monsters on a large map"""
+    random.seed(seed)
+    side = max(32, int((monsters * 4) ** 0.5))
+    game = game_class(width=side, height=side, max_monsters=0)
+    game.spawn_monsters(monsters)
+    game.player.hp = game.player.max_hp = 10**9
+    start = time.perf_counter()
+    for _ in range(turns):
+        game.step(Action.WAIT)
+    return 1000 * (time.perf_counter() - start) / turns
+
+
+class DictMonster:
+    """Dawny potwór z atrybutami w słowniku instancji - punkt odniesienia dla kolumn Monsters"""
+
+    def __init__(self, x, y, sprite, name, hp, attack, defense, exp_value):
+        self.x = x
+        self.y = y
+        self.sprite = sprite
+        self.name = name
+        self.hp = hp
+        self.max_hp = hp
+        self.attack = attack
+        self.defense = defense
+        self.exp_value = exp_value
+        self.uid = 0
+
+
+class SlotsMonster:
+    """Potwór ze __slots__ jak przed kolumnami Monsters: pozycja, życie, rodzaj i uid w atrybutach obiektu"""
+
+    __slots__ = ("x", "y", "hp", "max_hp", "kind", "uid")
+
+    def __init__(self, x, y, kind, hp):
+        self.x = x
+        self.y = y
+        self.hp = hp
+        self.max_hp = hp
+        self.kind = kind
+        self.uid = 0
+
+
+def packed_monsters(spawned: list) -> Monsters:
+    monsters = Monsters()
+    for uid, (kind, hp) in enumerate(spawned):
+        monsters.add(0, 0, kind, hp, hp, uid)
+    return monsters
+
+
+def bench_memory(monsters: int, seed: int) -> dict:
+    """Bytes allocated for a level's worth of monsters: dict-backed objects, slotted objects, packed Monsters columns"""
+    random.seed(seed)
+    game = GameCore(max_monsters=0)
+    game.level = 12  # Wszystkie rodzaje potworów
+    table = TABLES.monsters
+    spawned = [(kind, game.roll_hp(kind)) for kind in table.sampler(game.level).sample_many(monsters, game.level_rng)]
+    builders = {
+        "dict": lambda: [
+            DictMonster(0, 0, table.sprites[k], table.names[k], hp, table.attack[k], table.defense[k], table.exp[k])
+            for k, hp in spawned
+        ],
+        "slots": lambda: [SlotsMonster(0, 0, k, hp) for k, hp in spawned],
+        "packed": lambda: packed_monsters(spawned),
+    }
+    results = {}
+    for label, build in builders.items():
+        tracemalloc.start()
+        built = build()
+        results[label] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del built
+    return results
+
+
+def bench_systems(monsters: int, turns: int, seed: int) -> Profiler:
+    """Per-system times of the turn scheduler with the given number of monsters on a large map"""
+    random.seed(seed)
+    side = max(32, int((monsters * 4) ** 0.5))
+    game = GameCore(width=side, height=side, max_monsters=0, seed=seed)
+    game.spawn_monsters(monsters)
+    game.player.hp = game.player.max_hp = 10**9
+    game.scheduler.profiler = profiler = Profiler(window=turns)
+    profiler.wrap(game, "update")
+    for _ in range(turns):
+        game.step(Action.WAIT)
+    return profiler
+
+
+def legacy_monster_kind(level: int) -> str:
+    """Dawne losowanie rodzaju potwora: wagi liczone i random.choices przy każdym potworze"""
+    goblin_probability = 0.3 if level >= 5 else 0.8
+    troll_probability = 0.30 if level >= 3 else 0.05
+    dragon_probability = 0.80 if level != 0 and level % 10 == 0 else level / 100
+    return random.choices(
+        population=["Goblin", "Troll", "Smok"],
+        weights=[goblin_probability, troll_probability, dragon_probability],
+    )[0]
+
+
+def bench_spawn(count: int, level: int, seed: int) -> dict:
+    """Monster kind draws: per-spawn random.choices vs one batched alias-table draw, and full spawns/item rolls"""
+    random.seed(seed)
+    results = {}
+    start = time.perf_counter()
+    for _ in range(count):
+        legacy_monster_kind(level)
+    results["legacy_ms"] = 1000 * (time.perf_counter() - start)
+    start = time.perf_counter()
+    TABLES.monsters.sampler(level).sample_many(count)
+    results["alias_ms"] = 1000 * (time.perf_counter() - start)
+
+    game = GameCore(width=2 * int(count**0.5) + 10, height=2 * int(count**0.5) + 10, max_monsters=0)
+    game.level = level
+    start = time.perf_counter()
+    game.spawn_monsters(count)
+    results["spawn_ms"] = 1000 * (time.perf_counter() - start)
+    start = time.perf_counter()
+    game.generate_random_items(count, level)
+    results["items_ms"] = 1000 * (time.perf_counter() - start)
+    return results
+
+
+def bench_generate(generator: str, width: int, height: int, repeats: int, seed: int) -> float:
+    """Mean ms of GameCore.generate_level at the given map size"""
+    random.seed(seed)
+    game = GameCore(width=width, height=height, generator=generator, seed=seed)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        game.generate_level()
+    return 1000 * (time.perf_counter() - start) / repeats
+
+
+def bench_layouts(generator: str, width: int, height: int, seeds: int, levels: int) -> dict:
+    """Build levels 1..levels for game seeds 0..seeds-1 (LevelLayout): layouts/sec and sanity.
+
+    A layout is broken when building it fails or when the player, the stairs,
+    the chests and the monsters do not stand on distinct floor cells; it is
+    crowded when it got fewer chests or monsters than planned for its level.
+    """
+    broken, crowded = [], 0
+    start = time.perf_counter()
+    for seed in range(seeds):
+        streams = RandomStreams(seed)
+        for level in range(1, levels + 1):
+            try:
+                layout = LevelLayout(get_generator(generator), width, height, seed, level, streams.level(level))
+            except ValueError as error:
+                broken.append((seed, level, str(error)))
+                continue
+            cells = [layout.player_position, layout.stairs_down, *layout.chests]
+            cells += zip(layout.monsters.x, layout.monsters.y)
+            if len(set(cells)) != len(cells) or any(layout.map.is_wall(x, y) for x, y in cells):
+                broken.append((seed, level, "overlapping or walled-in cells"))
+            planned = min(NUM_MONSTERS + level, layout.max_monsters)
+            crowded += len(layout.chests) < NUM_CHESTS or len(layout.monsters) < planned
+    elapsed = time.perf_counter() - start
+    return {"layouts_per_sec": seeds * levels / elapsed, "crowded": crowded, "broken": broken}
+
+
+def bench_ai(monsters: int, turns: int, seed: int) -> dict:
+    """Batched vs per-monster AI turn time; both runs must end in the same positions"""
+    results = {}
+    positions = {}
+    for label, game_class in (("per_monster", PerMonsterGame), ("batched", GameCore)):
+        random.seed(seed)
+        side = max(32, int((monsters * 4) ** 0.5))
+        game = game_class(width=side, height=side, max_monsters=0, seed=seed)
+        game.spawn_monsters(monsters)
+        monster_turn = Scheduler(system for system in game.systems if system.name in MONSTER_SYSTEMS)
+        elapsed = 0.0
+        trace = []
+        for _ in range(turns):
+            # Gracz chodzi losowo, żeby część potworów go goniła
+            game.move_player(random.randint(-1, 1), random.randint(-1, 1))
+            start = time.perf_counter()
+            monster_turn.run(game)
+            elapsed += time.perf_counter() - start
+            trace.append([(monster.x, monster.y) for monster in game.monsters])
+        results[label] = 1000 * elapsed / turns
+        positions[label] = trace
+    results["identical"] = positions["per_monster"] == positions["batched"]
+    return results
+
+
+def bench_pathfinding(size: int, monsters: int, turns: int, seed: int) -> dict:
+    """Flow field (full rebuild and incremental) vs per-monster A* on a cave map"""
+    rng = random.Random(seed)
+    tiles = get_generator("caves").generate(size, size, rng)
+    floor = tiles.cells_of(Tile.FLOOR)
+    player = rng.choice(floor)
+    field = FlowField(tiles)
+    field.update(player % size, player // size)
+    # Potwory w zasięgu mapy odległości, jak te goniące gracza
+    near = [cell for cell in floor if field.distances[cell] != UNREACHED and cell != player]
+    hunters = [(cell % size, cell // size) for cell in rng.sample(near, min(monsters, len(near)))]
+    # Trasa gracza: kolejne kroki na sąsiednie pola podłogi
+    path = [(player % size, player // size)]
+    for _ in range(turns):
+        x, y = path[-1]
+        options = [(x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if not tiles.is_wall(x + dx, y + dy)]
+        path.append(rng.choice(options))
+
+    results = {}
+    for label in ("rebuild", "incremental", "astar"):
+        field = FlowField(tiles)
+        start = time.perf_counter()
+        for x, y in path:
+            if label == "astar":
+                for hunter in hunters:
+                    astar_next_step(tiles, hunter, (x, y))
+                continue
+            if label == "rebuild":
+                field.rebuild(x, y)
+            else:
+                field.update(x, y)
+            for hunter in hunters:
+                field.next_step(*hunter)
+        results[label] = 1000 * (time.perf_counter() - start) / len(path)
+    results["monsters"] = len(hunters)
+    return results
+
+
+def bench_fov(generator: str, size: int, turns: int, seed: int) -> dict:
+    """Field of view along a random walk: fresh shadowcast vs revisited (cached) positions"""
+    rng = random.Random(seed)
+    tiles = get_generator(generator).generate(size, size, rng)
+    cell = rng.choice(tiles.cells_of(Tile.FLOOR))
+    x, y = cell % size, cell // size
+    path = []
+    for _ in range(turns):
+        options = [(x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if not tiles.is_wall(x + dx, y + dy)]
+        x, y = rng.choice(options)
+        path.append((x, y))
+
+    fov = FieldOfView(tiles)
+    times = []
+    for x, y in path:
+        fov.origin = None
+        fov.cache.clear()
+        start = time.perf_counter()
+        fov.update(x, y)
+        times.append(time.perf_counter() - start)
+    # Druga trasa po tych samych polach - wszystkie pozycje są już w pamięci podręcznej
+    for x, y in path:
+        fov.origin = None
+        fov.update(x, y)
+    start = time.perf_counter()
+    for x, y in path:
+        fov.origin = None
+        fov.update(x, y)
+    cached = (time.perf_counter() - start) / len(path)
+    return {
+        "mean_ms": 1000 * sum(times) / len(times),
+        "max_ms": 1000 * max(times),
+        "cached_ms": 1000 * cached,
+        "cells": len(fov.visible),
+    }
+
+
+def load_frontend():
+    """Import pygame frontend with a dummy video driver (no window)"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import main as frontend
+
+    return frontend
+
+
+def bench_render(frames: int, seed: int, full: bool, **game_options) -> dict:
+    """Frame time of Game.draw with dirty rectangles, or with a full redraw every frame"""
+    frontend = load_frontend()
+    random.seed(seed)
+    game = frontend.Game(**game_options)
+    stats = game.renderer.stats
+    for _ in range(frames):
+        if full:
+            game.renderer.invalidate()
+        game.draw()
+        # Klatki oczekiwania na klawisz przeplatane z turami gry
+        if random.random() < 0.1:
+            game.step(random.choice(ACTIONS))
+            if game.done:
+                game = frontend.Game(**game_options)
+                game.renderer.stats = stats
+    return stats.summary()
+
+
+def legacy_load_images() -> dict:
+    """Dawne ładowanie: osobny PNG i convert_alpha() dla każdego sprite'a"""
+    import pygame
+
+    names = [name for name in SPRITES if name not in FLIPPED]
+    return {name: pygame.image.load(os.path.join(IMAGES_DIR, f"{name}.png")).convert_alpha() for name in names}
+
+
+def bench_assets(repeats: int) -> dict:
+    """Sprite loading in ms: separate PNGs vs atlas built from PNGs (cold) vs atlas read from the disk cache (warm)"""
+    import subprocess
+    import tempfile
+
+    frontend = load_frontend()
+    frontend.open_window()  # convert_alpha wymaga okna
+    results = {"legacy": min(timed(legacy_load_images) for _ in range(repeats))}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "atlas.bin")
+
+        def cold():
+            if os.path.exists(path):
+                os.remove(path)
+            SpriteAtlas(frontend.TILE_SIZE, path).load()
+
+        results["atlas_cold"] = min(timed(cold) for _ in range(repeats))
+        results["atlas_warm"] = min(timed(SpriteAtlas(frontend.TILE_SIZE, path).load) for _ in range(repeats))
+
+    # Cały start procesu: import frontendu z otwarciem okna (dawniej z ładowaniem obrazków) i pierwsze rysowanie
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = {
+        "import_legacy": "import benchmarks, main; main.open_window(); benchmarks.legacy_load_images()",
+        "import": "import main; main.open_window()",
+        "first_draw": "import main; main.Game().draw()",
+    }
+    environment = {**os.environ, "SDL_VIDEODRIVER": "dummy", "PYGAME_HIDE_SUPPORT_PROMPT": "1"}
+    for label, script in scripts.items():
+        command = functools.partial(
+            subprocess.run,
+            [sys.executable, "-c", script],
+            cwd=here,
+            env=environment,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        results[label] = min(timed(command) for _ in range(repeats))
+    return results
+
+
+def timed(function) -> float:
+    """Czas jednego wywołania w ms"""
+    start = time.perf_counter()
+    function()
+    return 1000 * (time.perf_counter() - start)
+
+
+def bench_inventory(items: int, moves: int, seed: int) -> dict:
+    """Looting cost per item, inventory screen frame time with the cursor walking a long list, text cache counters"""
+    frontend = load_frontend()
+    import pygame
+
+    from eventloop import EventLoop
+
+    class ScriptedEventLoop(EventLoop):
+        """Jedno zdarzenie na klatkę z przygotowanej listy zamiast czekania na klawisze"""
+
+        def __init__(self, keys: list):
+            super().__init__()
+            self.script = [pygame.event.Event(pygame.KEYDOWN, key=key) for key in keys]
+
+        def next_events(self):
+            if not self.pending:
+                self.pending.append(self.script.pop(0))
+            return self.pending
+
+    random.seed(seed)
+    game = frontend.Game()
+    loot = [game.generate_random_item(random.randint(1, 10)) for _ in range(items)]
+    start = time.perf_counter()
+    for item in loot:
+        game.player.inventory.add(item)
+        if item.category != "potion":
+            game.use_item(item)  # Bot zakłada każdy nowy przedmiot
+        game.player.total_attack() + game.player.total_defense()
+    loot_us = 1e6 * (time.perf_counter() - start) / items
+    # Kursor w dół i z powrotem, żeby lista się przewijała
+    keys = [pygame.K_DOWN] * (moves // 2) + [pygame.K_UP] * (moves - moves // 2)
+    game.event_loop = ScriptedEventLoop(keys + [pygame.K_ESCAPE])
+    cache = frontend.text_cache
+    cache.hits = cache.misses = 0
+    start = time.perf_counter()
+    game.open_inventory()
+    elapsed = time.perf_counter() - start
+    return {"loot_us": loot_us, "frame_ms": 1000 * elapsed / (moves + 1), **cache.summary()}
+
+
+def bench_idle(seconds: float, fps: int, legacy: bool) -> dict:
+    """CPU usage of an idle game waiting for input, as a fraction of one core"""
+    frontend = load_frontend()
+    import pygame
+
+    from eventloop import EventLoop
+
+    game = frontend.Game()
+    game.event_loop = EventLoop(fps)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    if legacy:
+        # Dawna pętla: odpytywanie bez czekania i pełne przerysowanie w każdym przebiegu
+        while time.perf_counter() - wall_start < seconds:
+            pygame.event.get()
+            game.renderer.invalidate()
+            game.draw()
+    else:
+        pygame.time.set_timer(pygame.USEREVENT, int(seconds * 1000), loops=1)
+        game.event_loop.run(game.draw, lambda event: event.type != pygame.USEREVENT)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    return {"seconds": wall, "cpu_seconds": cpu, "cpu_ratio": cpu / wall}
+
+
+def suite_generate_level(generator: str):
+    def case(seed: int) -> float:
+        return 1000 * bench_generate(generator, 80, 50, 25, seed)
+
+    return case
+
+
+def crowded_game(seed: int) -> GameCore:
+    """Mapa 100x100, na której potwory zajmują 90% wolnej podłogi"""
+    game = GameCore(width=100, height=100, max_monsters=0, seed=seed)
+    assert game.free_cells is not None
+    game.spawn_monsters(int(len(game.free_cells) * 0.9))
+    return game
+
+
+def suite_floor_position_crowded(seed: int) -> float:
+    """Losowanie wolnego pola (bez przebudowy puli), µs na wywołanie"""
+    game = crowded_game(seed)
+    assert game.free_cells is not None
+    count = len(game.free_cells) // 2
+    start = time.perf_counter()
+    for _ in range(count):
+        game.get_random_floor_position()
+    return 1e6 * (time.perf_counter() - start) / count
+
+
+def suite_free_cells_rebuild_crowded(seed: int) -> float:
+    """Pierwsze losowanie po wczytaniu/kopii gry: przebudowa puli wolnych pól, µs"""
+    game = crowded_game(seed)
+    rebuilds = 20
+    elapsed = 0.0
+    for _ in range(rebuilds):
+        game.free_cells = None
+        start = time.perf_counter()
+        game.get_random_floor_position()
+        elapsed += time.perf_counter() - start
+    return 1e6 * elapsed / rebuilds
+
+
+def suite_move_monsters(monsters: int):
+    def case(seed: int) -> float:
+        return 1000 * bench_turn(GameCore, monsters, 20, seed)
+
+    return case
+
+
+def suite_is_occupied(seed: int) -> float:
+    game = GameCore(width=200, height=200, max_monsters=0, seed=seed)
+    game.spawn_monsters(10000)
+    rng = random.Random(seed)
+    cells = [(rng.randrange(200), rng.randrange(200)) for _ in range(100000)]
+    start = time.perf_counter()
+    for x, y in cells:
+        game.is_occupied(x, y)
+    return 1e6 * (time.perf_counter() - start) / len(cells)
+
+
+def suite_draw(full: bool):
+    def case(seed: int) -> float:
+        return 1000 * bench_render(500, seed, full)["mean_ms"]
+
+    return case
+
+
+def suite_inventory(seed: int) -> float:
+    """Dodanie i usunięcie przedmiotu w ekwipunku z 10 000 przedmiotów, µs na operację"""
+    rng = random.Random(seed)
+    items = [Item("Sword", "sword", rng.randint(0, 50), rng.randint(0, 50)) for _ in range(10000)]
+    inventory = Inventory()
+    start = time.perf_counter()
+    for item in items:
+        inventory.add(item)
+    for item in items:
+        inventory.remove(item)
+    return 1e6 * (time.perf_counter() - start) / (2 * len(items))
+
+
+def suite_combat(seed: int) -> float:
+    """Atak gracza na sąsiedniego potwora (trafienie, bez zabicia), µs na atak"""
+    game = GameCore(width=40, height=40, max_monsters=0, seed=seed)
+    player = game.player
+    x, y = player.x + 1, player.y
+    if game.map.is_wall(x, y) or game.is_occupied(x, y):
+        x = player.x - 1
+    monster = game.create_monster(x, y, 0)
+    monster.hp = monster.max_hp = 10**9
+    attacks = 20000
+    start = time.perf_counter()
+    for _ in range(attacks):
+        game.attack()
+    return 1e6 * (time.perf_counter() - start) / attacks
+
+
+# Przypadki zestawu regresyjnego: nazwa -> funkcja(seed) zwracająca czas operacji w µs
+SUITE = {
+    **{f"generate_level/{name}/80x50": suite_generate_level(name) for name in GENERATORS},
+    "get_random_floor_position/crowded": suite_floor_position_crowded,
+    "get_random_floor_position/crowded_rebuild": suite_free_cells_rebuild_crowded,
+    "move_monsters/1000": suite_move_monsters(1000),
+    "move_monsters/10000": suite_move_monsters(10000),
+    "is_occupied/10000": suite_is_occupied,
+    "draw/dirty": suite_draw(False),
+    "draw/full": suite_draw(True),
+    "inventory/add_remove/10000": suite_inventory,
+    "combat/attack": suite_combat,
+}
+
+
+def run_suite(names: list, repeats: int, seed: int) -> dict:
+    """Mediana z repeats pomiarów każdego przypadku (µs).
+
+    Cases run round-robin, one measurement of each per round, so a burst of
+    load on the machine hits all of them a little instead of one of them a lot.
+    """
+    samples: dict[str, list[float]] = {name: [] for name in names}
+    for _ in range(repeats):
+        for name in names:
+            samples[name].append(SUITE[name](seed))
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+def suite_tolerances(names, tolerance: float | None = None) -> dict:
+    """Dopuszczalny wzrost czasu każdego przypadku: tolerance dla wszystkich albo wartości z SUITE_TOLERANCES"""
+    if tolerance is not None:
+        return dict.fromkeys(names, tolerance)
+    return {name: SUITE_TOLERANCES.get(name, SUITE_TOLERANCE) for name in names}
+
+
+def machine_factor(results: dict, baseline: dict) -> float:
+    """Ile razy wolniej ta maszyna liczy teraz niż przy zapisie odniesienia: mediana stosunków wszystkich przypadków.
+
+    One case that regresses barely moves the median, so every case is judged
+    against the rest of the suite instead of against absolute times taken on
+    a differently loaded (or a different) machine. With fewer than
+    SUITE_MIN_CASES cases to compare, times are compared as they are.
+    """
+    ratios = [value / baseline[name] for name, value in results.items() if name in baseline]
+    return statistics.median(ratios) if len(ratios) >= SUITE_MIN_CASES else 1.0
+
+
+def compare_baseline(results: dict, baseline: dict, tolerances: dict, factor: float = 1.0) -> dict:
+    """Dla każdego przypadku z odniesieniem: (odniesienie, stosunek do odniesienia razy factor, czy w normie)"""
+    comparison = {}
+    for name, value in results.items():
+        if name in baseline:
+            ratio = value / (baseline[name] * factor)
+            comparison[name] = (baseline[name], ratio, ratio <= 1 + tolerances[name])
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    suite = subparsers.add_parser("suite", help="Zestaw regresyjny: wyniki do JSON, porównanie z odniesieniem")
+    suite.add_argument("--cases", nargs="+", choices=list(SUITE), default=list(SUITE))
+    suite.add_argument("--repeats", type=int, default=SUITE_REPEATS, help="Pomiary każdego przypadku (mediana)")
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--output", metavar="PATH", help="Zapisz wyniki jako JSON")
+    suite.add_argument("--baseline", metavar="PATH", default=BASELINE_PATH)
+    suite.add_argument(
+        "--tolerance", type=float, help="Dopuszczalny wzrost czasu (0.5 = 50%%) dla wszystkich przypadków naraz"
+    )
+    suite.add_argument("--update-baseline", action="store_true", help="Zapisz wyniki jako nowe odniesienie")
+
+    headless = subparsers.add_parser("headless", help="Przepustowość silnika bez ekranu")
+    headless.add_argument("--steps", type=int, default=100_000)
+    headless.add_argument("--seed", type=int, default=0)
+
+    render = subparsers.add_parser("render", help="Czas rysowania klatki")
+    render.add_argument("--frames", type=int, default=2000)
+    render.add_argument("--seed", type=int, default=0)
+    render.add_argument("--sizes", type=int, nargs="+", default=[20], help="Boki kwadratowych map do porównania")
+    render.add_argument("--generator", choices=list(GENERATORS), default="open")
+
+    ai = subparsers.add_parser("ai", help="Grupowy krok AI a ruch potworów jeden po drugim")
+    ai.add_argument("--monsters", type=int, nargs="+", default=[100, 1000, 10000])
+    ai.add_argument("--turns", type=int, default=20)
+    ai.add_argument("--seed", type=int, default=0)
+
+    pathfinding = subparsers.add_parser("pathfinding", help="Mapa odległości a A* dla każdego potwora")
+    pathfinding.add_argument("--sizes", type=int, nargs="+", default=[200, 1000])
+    pathfinding.add_argument("--monsters", type=int, default=100)
+    pathfinding.add_argument("--turns", type=int, default=20)
+    pathfinding.add_argument("--seed", type=int, default=0)
+
+    fov = subparsers.add_parser("fov", help="Czas przeliczenia pola widzenia gracza")
+    fov.add_argument("--size", type=int, default=1000)
+    fov.add_argument("--generators", nargs="+", default=list(GENERATORS))
+    fov.add_argument("--turns", type=int, default=200)
+    fov.add_argument("--seed", type=int, default=0)
+
+    inventory = subparsers.add_parser("inventory", help="Czas klatki ekranu ekwipunku a liczba przedmiotów")
+    inventory.add_argument("--items", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    inventory.add_argument("--moves", type=int, default=200)
+    inventory.add_argument("--seed", type=int, default=0)
+
+    idle = subparsers.add_parser("idle", help="Zużycie CPU podczas czekania na klawisz")
+    idle.add_argument("--seconds", type=float, default=3.0)
+    idle.add_argument("--fps", type=int, default=0, help="0 - blokuj na pygame.event.wait()")
+    idle.add_argument("--legacy", action="store_true", help="Zmierz dawną pętlę aktywnego odpytywania")
+
+    systems = subparsers.add_parser("systems", help="Czasy systemów tury w zależności od liczby potworów")
+    systems.add_argument("--monsters", type=int, nargs="+", default=[100, 1000, 10000])
+    systems.add_argument("--turns", type=int, default=20)
+    systems.add_argument("--seed", type=int, default=0)
+
+    memory = subparsers.add_parser("memory", help="Pamięć zajmowana przez potwory")
+    memory.add_argument("--monsters", type=int, nargs="+", default=[1000, 100000])
+    memory.add_argument("--seed", type=int, default=0)
+
+    record = subparsers.add_parser("record", help="Nagraj grę losowego gracza do logu wejścia")
+    record.add_argument("output", help="Plik logu")
+    record.add_argument("--steps", type=int, default=20000)
+    record.add_argument("--size", type=int, default=100)
+    record.add_argument("--generator", choices=list(GENERATORS), default="caves")
+    record.add_argument("--seed", type=int, default=0)
+
+    replay_parser = subparsers.add_parser("replay", help="Odtwórz log wejścia jako deterministyczne obciążenie")
+    replay_parser.add_argument("log", help="Plik logu z main.py --record albo benchmarks.py record")
+    replay_parser.add_argument("--repeats", type=int, default=3)
+
+    frames = subparsers.add_parser("frames", help="Renderowanie klatek bez okna z logu: klatki/s a liczba procesów")
+    frames.add_argument("--log", metavar="PATH", help="Log wejścia; domyślnie nagrywana gra bota")
+    frames.add_argument("--steps", type=int, default=1000)
+    frames.add_argument("--size", type=int, default=60)
+    frames.add_argument("--generator", choices=list(GENERATORS), default="caves")
+    frames.add_argument("--workers", type=int, nargs="+", default=worker_counts(os.cpu_count()))
+    frames.add_argument("--frames-per-task", type=int, default=FRAMES_PER_TASK)
+    frames.add_argument("--seed", type=int, default=0)
+
+    descend = subparsers.add_parser("descend", help="Opóźnienie zejścia na niższy poziom: budowa w tle a na miejscu")
+    descend.add_argument("--sizes", type=int, nargs="+", default=[80, 200, 500])
+    descend.add_argument("--generator", choices=list(GENERATORS), default="caves")
+    descend.add_argument("--levels", type=int, default=10)
+    descend.add_argument("--play-ms", type=float, default=300, help="Czas gry na poziomie przed zejściem")
+    descend.add_argument("--seed", type=int, default=0)
+
+    levels = subparsers.add_parser("levels", help="Trwały loch: pamięć poziomów i czas przełączenia według warstwy")
+    levels.add_argument("--sizes", type=int, nargs="+", default=[80, 200, 500])
+    levels.add_argument("--generator", choices=list(GENERATORS), default="caves")
+    levels.add_argument("--levels", type=int, default=10)
+    levels.add_argument("--resident", type=int, default=3, help="Poziomy trzymane bez kompresji")
+    levels.add_argument("--budget", type=float, default=1, help="Pamięć na poziomy w MiB")
+    levels.add_argument("--seed", type=int, default=0)
+
+    assets = subparsers.add_parser("assets", help="Czas ładowania sprite'ów i startu gry")
+    assets.add_argument("--repeats", type=int, default=5)
+
+    vecenv = subparsers.add_parser("vecenv", help="Przepustowość środowiska wektorowego dla botów")
+    vecenv.add_argument("--counts", type=int, nargs="+", default=[1, 8, 64])
+    vecenv.add_argument("--sizes", type=int, nargs="+", default=[20, 64])
+    vecenv.add_argument("--steps", type=int, default=2000)
+    vecenv.add_argument("--seed", type=int, default=0)
+
+    snapshot = subparsers.add_parser("snapshot", help="Kopie stanu gry oraz zapis/odczyt")
+    snapshot.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 1000])
+    snapshot.add_argument("--generator", choices=list(GENERATORS), default="caves")
+    snapshot.add_argument("--forks", type=int, default=2000)
+    snapshot.add_argument("--seed", type=int, default=0)
+
+    spawn = subparsers.add_parser("spawn", help="Losowanie potworów i przedmiotów z tabel")
+    spawn.add_argument("--counts", type=int, nargs="+", default=[1000, 100000])
+    spawn.add_argument("--level", type=int, default=10)
+    spawn.add_argument("--seed", type=int, default=0)
+
+    turn = subparsers.add_parser("turn", help="Czas tury w zależności od liczby potworów")
+    turn.add_argument("--monsters", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    turn.add_argument("--turns", type=int, default=20)
+    turn.add_argument("--seed", type=int, default=0)
+
+    generate = subparsers.add_parser("generate", help="Czas generowania poziomu dla różnych rozmiarów mapy")
+    generate.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 500, 1000])
+    generate.add_argument("--generators", nargs="+", default=list(GENERATORS))
+    generate.add_argument("--repeats", type=int, default=5)
+    generate.add_argument("--seed", type=int, default=0)
+
+    layouts = subparsers.add_parser("layouts", help="Budowa poziomów 1..N dla wielu ziaren: czy wszystko się mieści")
+    layouts.add_argument("--sizes", nargs="+", default=["10x8", "20x13", "80x50"], help="Rozmiary map SZERxWYS")
+    layouts.add_argument("--generators", nargs="+", choices=list(GENERATORS), default=list(GENERATORS))
+    layouts.add_argument("--seeds", type=int, default=100)
+    layouts.add_argument("--levels", type=int, default=MAX_DUNGEON_LEVELS)
+
+    args = parser.parse_args()
+    if args.benchmark == "suite":
+        output, baseline_path = args.output, args.baseline
+        results = run_suite(args.cases, args.repeats, args.seed)
+        baseline = {}
+        if os.path.exists(baseline_path) and not args.update_baseline:
+            with open(baseline_path) as file:
+                baseline = json.load(file)["results"]
+        tolerances = suite_tolerances(results, args.tolerance)
+        factor = machine_factor(results, baseline)
+        comparison = compare_baseline(results, baseline, tolerances, factor)
+        print(f"machine factor {factor:.2f} (ratios below are relative to it)")
+        print(f"{'case':<42} {'us':>11} {'baseline':>11} {'ratio':>6} {'result':>7}")
+        for name, value in results.items():
+            if name in comparison:
+                reference, ratio, ok = comparison[name]
+                print(f"{name:<42} {value:>11.2f} {reference:>11.2f} {ratio:>6.2f} {'PASS' if ok else 'FAIL':>7}")
+            else:
+                print(f"{name:<42} {value:>11.2f} {'-':>11} {'-':>6} {'-':>7}")
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeats": args.repeats,
+            "tolerances": tolerances,
+            "machine_factor": factor,
+            "unit": "us",
+            "results": results,
+            "regressions": sorted(name for name, (_, _, ok) in comparison.items() if not ok),
+        }
+        for path in (output, baseline_path if args.update_baseline else None):
+            if path:
+                with open(path, "w") as file:
+                    json.dump(report, file, indent=2, sort_keys=True)
+                    file.write("\n")
+        if report["regressions"]:
+            sys.exit(1)
+    elif args.benchmark == "headless":
+        result = bench_headless(args.steps, args.seed)
+        print(
+            f"{result['steps']} steps, {result['games']} games in {result['seconds']:.2f}s"
+            f" -> {result['steps_per_sec']:.0f} steps/sec"
+        )
+    elif args.benchmark == "render":
+        for size, (label, full) in itertools.product(args.sizes, (("full redraw", True), ("dirty rects", False))):
+            options = {"width": size, "height": size, "generator": args.generator}
+            result = bench_render(args.frames, args.seed, full, **options)
+            print(
+                f"{size}x{size} {label}: {result['frames']} frames, mean {result['mean_ms']:.3f} ms,"
+                f" max {result['max_ms']:.3f} ms, {result['mean_rects']:.1f} rects/frame"
+            )
+    elif args.benchmark == "turn":
+        print(f"{'monsters':>10} {'grid ms':>10} {'linear ms':>10}")
+        for monsters in args.monsters:
+            grid = bench_turn(GameCore, monsters, args.turns, args.seed)
+            linear = bench_turn(LinearScanGame, monsters, args.turns, args.seed)
+            print(f"{monsters:>10} {grid:>10.3f} {linear:>10.3f}")
+    elif args.benchmark == "systems":
+        names = [system.name for system in GameCore.systems]
+        stages = Scheduler(GameCore.systems).describe()
+        print("stages: " + " | ".join(", ".join(stage) for stage in stages) + "; mean ms per turn")
+        print(f"{'monsters':>10}" + "".join(f"{name:>10}" for name in names) + f"{'update':>10}")
+        for monsters in args.monsters:
+            summary = bench_systems(monsters, args.turns, args.seed).summary()
+            times = [summary[name]["mean_ms"] for name in (*names, "update")]
+            print(f"{monsters:>10}" + "".join(f"{value:>10.3f}" for value in times))
+    elif args.benchmark == "memory":
+        labels = ("dict", "slots", "packed")
+        print(f"{'monsters':>10}" + "".join(f"{label + ' MB':>11}" for label in labels), end="")
+        print("".join(f"{label + ' B/each':>15}" for label in labels))
+        for monsters in args.monsters:
+            result = bench_memory(monsters, args.seed)
+            print(
+                f"{monsters:>10}"
+                + "".join(f"{result[label] / 2**20:>11.2f}" for label in labels)
+                + "".join(f"{result[label] / monsters:>15.0f}" for label in labels)
+            )
+    elif args.benchmark == "record":
+        options = {"width": args.size, "height": args.size, "generator": args.generator}
+        log = record_session(args.steps, args.seed, **options)
+        log.save(args.output)
+        print(f"{len(log.records)} bytes of input saved to {args.output}")
+    elif args.benchmark == "frames":
+        if args.log:
+            log = InputLog.load(args.log)
+        else:
+            log = record_session(args.steps, args.seed, width=args.size, height=args.size, generator=args.generator)
+        results = bench_frames(log, args.workers, args.frames_per_task)
+        print(f"{'workers':>7} {'frames':>7} {'seconds':>8} {'frames/s':>9} {'speedup':>8} {'identical':>10}")
+        for result in results:
+            identical = result["digest"] == results[0]["digest"]
+            print(
+                f"{result['workers']:>7} {result['frames']:>7} {result['seconds']:>8.2f} {result['fps']:>9.1f}"
+                f" {result['fps'] / results[0]['fps']:>8.2f} {identical!s:>10}"
+            )
+            if not identical:
+                sys.exit(1)
+    elif args.benchmark == "replay":
+        result = bench_replay(InputLog.load(args.log), args.repeats)
+        print(
+            f"{result['steps']} steps, best of {args.repeats}: {result['best_s']:.3f}s"
+            f" ({result['steps_per_sec']:.0f} steps/sec), deterministic: {result['deterministic']}"
+        )
+        if not result["deterministic"]:
+            sys.exit(1)
+    elif args.benchmark == "descend":
+        print(f"{args.generator}, {args.play_ms:.0f} ms of play per level, transition ms")
+        print(f"{'map':>9} {'sync p50':>9} {'sync max':>9} {'bg p50':>8} {'bg max':>8} {'identical':>10}")
+        for size in args.sizes:
+            options = (size, args.generator, args.levels, args.play_ms, args.seed)
+            sync, background = bench_descend(GameCore, *options), bench_descend(PrefetchingGame, *options)
+            identical = sync["signatures"] == background["signatures"]
+            print(
+                f"{f'{size}x{size}':>9} {sync['p50_ms']:>9.2f} {sync['max_ms']:>9.2f} {background['p50_ms']:>8.3f}"
+                f" {background['max_ms']:>8.3f} {identical!s:>10}"
+            )
+            if not identical:
+                sys.exit(1)
+    elif args.benchmark == "levels":
+        print(f"{args.generator}, {args.resident} live levels, budget {args.budget:g} MiB; swap ms, stored KiB")
+        print(
+            f"{'map':>9} {'new':>8} {'revisit':>8} {'live':>7} {'packed':>7} {'disk':>7}"
+            f" {'live KiB':>9} {'packed KiB':>11} {'disk KiB':>9} {'intact':>7}"
+        )
+        for size in args.sizes:
+            result = bench_levels(size, args.generator, args.levels, args.resident, int(args.budget * 2**20), args.seed)
+            store = result["store"]
+            swaps = [f"{store[tier]['mean_ms']:>7.3f}" if "swaps" in store[tier] else f"{'-':>7}" for tier in TIERS]
+            kib = [store[tier]["bytes"] / 1024 for tier in TIERS]
+            print(
+                f"{f'{size}x{size}':>9} {result['new_ms']:>8.2f} {result['revisit_ms']:>8.2f} {' '.join(swaps)}"
+                f" {kib[0]:>9.1f} {kib[1]:>11.1f} {kib[2]:>9.1f} {result['intact']!s:>7}"
+            )
+            if not result["intact"]:
+                sys.exit(1)
+    elif args.benchmark == "assets":
+        result = bench_assets(args.repeats)
+        print(f"sprites: legacy PNGs {result['legacy']:.2f} ms, atlas cold {result['atlas_cold']:.2f} ms,")
+        print(f"         atlas warm {result['atlas_warm']:.2f} ms")
+        print(
+            f"process: import main + legacy sprites {result['import_legacy']:.0f} ms,"
+            f" import main {result['import']:.0f} ms, import + first draw {result['first_draw']:.0f} ms"
+        )
+    elif args.benchmark == "vecenv":
+        print(f"{'map':>7} {'envs':>5} {'steps/s':>9} {'observe':>8}")
+        for size in args.sizes:
+            for count in args.counts:
+                result = bench_vecenv(count, max(args.steps // count, 10), size, args.seed)
+                print(
+                    f"{f'{size}x{size}':>7} {count:>5} {result['steps_per_sec']:>9.0f}"
+                    f" {result['observe_share']:>8.1%}"
+                )
+    elif args.benchmark == "snapshot":
+        print(
+            f"{'map':>10} {'forks/s':>9} {'deepcopy/s':>11} {'save KB':>8} {'dumps ms':>9} {'loads ms':>9}"
+            f" {'load file ms':>13}"
+        )
+        for size in args.sizes:
+            result = bench_snapshot(size, args.generator, args.forks, args.seed)
+            print(
+                f"{f'{size}x{size}':>10} {result['snapshot_per_sec']:>9.0f} {result['deepcopy_per_sec']:>11.0f}"
+                f" {result['bytes'] / 1024:>8.1f} {result['dumps_ms']:>9.3f} {result['loads_ms']:>9.3f}"
+                f" {result['load_file_ms']:>13.3f}"
+            )
+    elif args.benchmark == "spawn":
+        print(f"level {args.level}, ms per batch")
+        print(f"{'count':>10} {'choices':>9} {'alias':>9} {'spawn':>9} {'items':>9}")
+        for count in args.counts:
+            result = bench_spawn(count, args.level, args.seed)
+            print(
+                f"{count:>10} {result['legacy_ms']:>9.2f} {result['alias_ms']:>9.2f}"
+                f" {result['spawn_ms']:>9.2f} {result['items_ms']:>9.2f}"
+            )
+    elif args.benchmark == "generate":
+        print(f"{'size':>10}" + "".join(f"{name + ' ms':>12}" for name in args.generators))
+        for size in args.sizes:
+            times = [bench_generate(name, size, size, args.repeats, args.seed) for name in args.generators]
+            print(f"{f'{size}x{size}':>10}" + "".join(f"{value:>12.2f}" for value in times))
+    elif args.benchmark == "layouts":
+        print(f"{args.seeds} seeds x {args.levels} levels")
+        print(f"{'map':>10} {'generator':>10} {'layouts/s':>10} {'crowded':>8} {'broken':>7}")
+        failed = False
+        for size in args.sizes:
+            width, height = map(int, size.split("x"))
+            for name in args.generators:
+                result = bench_layouts(name, width, height, args.seeds, args.levels)
+                print(
+                    f"{size:>10} {name:>10} {result['layouts_per_sec']:>10.0f} {result['crowded']:>8}"
+                    f" {len(result['broken']):>7}"
+                )
+                for seed, level, error in result["broken"][:5]:
+                    print(f"    seed {seed}, level {level}: {error}")
+                failed = failed or bool(result["broken"])
+        if failed:
+            sys.exit(1)
+    elif args.benchmark == "ai":
+        print(f"{'monsters':>10} {'per-monster ms':>15} {'batched ms':>12} {'identical':>10}")
+        for monsters in args.monsters:
+            result = bench_ai(monsters, args.turns, args.seed)
+            print(
+                f"{monsters:>10} {result['per_monster']:>15.3f} {result['batched']:>12.3f}"
+                f" {result['identical']!s:>10}"
+            )
+            if not result["identical"]:
+                sys.exit(1)
+    elif args.benchmark == "pathfinding":
+        print(f"radius {FLOW_RADIUS}, ms per turn")
+        print(f"{'map':>10} {'monsters':>9} {'rebuild':>9} {'incremental':>12} {'A*':>9}")
+        for size in args.sizes:
+            result = bench_pathfinding(size, args.monsters, args.turns, args.seed)
+            print(
+                f"{f'{size}x{size}':>10} {result['monsters']:>9} {result['rebuild']:>9.3f}"
+                f" {result['incremental']:>12.3f} {result['astar']:>9.3f}"
+            )
+    elif args.benchmark == "fov":
+        print(f"radius {FOV_RADIUS}, {args.size}x{args.size}, target mean <= {FOV_TARGET_MS:.1f} ms")
+        print(f"{'generator':>10} {'mean ms':>9} {'max ms':>9} {'cached ms':>10} {'result':>7}")
+        passed = True
+        for generator in args.generators:
+            result = bench_fov(generator, args.size, args.turns, args.seed)
+            ok = result["mean_ms"] <= FOV_TARGET_MS
+            passed &= ok
+            print(
+                f"{generator:>10} {result['mean_ms']:>9.3f} {result['max_ms']:>9.3f}"
+                f" {result['cached_ms']:>10.4f} {'PASS' if ok else 'FAIL':>7}"
+            )
+        if not passed:
+            sys.exit(1)
+    elif args.benchmark == "inventory":
+        print(f"{'items':>10} {'loot us':>8} {'frame ms':>9} {'text hits':>10} {'misses':>7} {'hit ratio':>10}")
+        for items in args.items:
+            result = bench_inventory(items, args.moves, args.seed)
+            print(
+                f"{items:>10} {result['loot_us']:>8.2f} {result['frame_ms']:>9.3f}"
+                f" {result['hits']:>10} {result['misses']:>7} {result['hit_ratio']:>10.2f}"
+            )
+    elif args.benchmark == "idle":
+        result = bench_idle(args.seconds, args.fps, args.legacy)
+        passed = result["cpu_ratio"] <= IDLE_CPU_TARGET
+        print(
+            f"idle CPU {100 * result['cpu_ratio']:.2f}% of one core over {result['seconds']:.1f}s"
+            f" (target <= {100 * IDLE_CPU_TARGET:.0f}%): {'PASS' if passed else 'FAIL'}"
+        )
+        if not passed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Proceduralne generatory lochów: otwarta sala, pokoje BSP z korytarzami, jaskinie"""
+
+import random
+import re
+
+from tilemap import Tile, TileMap
+
+# Rozpakowanie bajtu na 8 bajtów 0/1 (najmłodszy bit pierwszy)
+UNPACK_BITS = [bytes((value >> bit) & 1 for bit in range(8)) for value in range(256)]
+FLOOR_RUN = re.compile(b"\x00+")
+
+
+class Generator:
+    """Base class: generate(width, height, rng) -> TileMap with walls on the border"""
+
+    def generate(self, width: int, height: int, rng: random.Random) -> TileMap:
+        raise NotImplementedError
+
+
+class OpenGenerator(Generator):
+    """Otwarta prostokątna sala otoczona ścianami (pierwotny układ gry)"""
+
+    def generate(self, width: int, height: int, rng: random.Random) -> TileMap:
+        tiles = TileMap(width, height, Tile.FLOOR)
+        tiles.fill_border(Tile.WALL)
+        return tiles
+
+
+class BSPGenerator(Generator):
+    """Rooms in leaves of a binary space partition, siblings joined by L-shaped corridors"""
+
+    def __init__(self, min_leaf: int = 10, min_room: int = 4):
+        self.min_leaf = min_leaf
+        self.min_room = min_room
+
+    def generate(self, width: int, height: int, rng: random.Random) -> TileMap:
+        tiles = TileMap(width, height, Tile.WALL)
+        self.split(tiles, rng, 1, 1, width - 2, height - 2)
+        return tiles
+
+    def split(self, tiles: TileMap, rng: random.Random, x: int, y: int, w: int, h: int) -> tuple:
+        """Podziel obszar, wykuj pokoje w liściach i zwróć środek jednego z nich"""
+        can_split_x = w >= 2 * self.min_leaf
+        can_split_y = h >= 2 * self.min_leaf
+        if not can_split_x and not can_split_y:
+            return self.carve_room(tiles, rng, x, y, w, h)
+
+        if can_split_x and (not can_split_y or w > h or (w == h and rng.random() < 0.5)):
+            cut = rng.randint(self.min_leaf, w - self.min_leaf)
+            first = self.split(tiles, rng, x, y, cut, h)
+            second = self.split(tiles, rng, x + cut, y, w - cut, h)
+        else:
+            cut = rng.randint(self.min_leaf, h - self.min_leaf)
+            first = self.split(tiles, rng, x, y, w, cut)
+            second = self.split(tiles, rng, x, y + cut, w, h - cut)
+        self.carve_corridor(tiles, rng, first, second)
+        return first if rng.random() < 0.5 else second
+
+    def carve_room(self, tiles: TileMap, rng: random.Random, x: int, y: int, w: int, h: int) -> tuple:
+        room_w = rng.randint(min(self.min_room, w), max(min(self.min_room, w), w - 1))
+        room_h = rng.randint(min(self.min_room, h), max(min(self.min_room, h), h - 1))
+        room_x = x + rng.randint(0, w - room_w)
+        room_y = y + rng.randint(0, h - room_h)
+        floor = bytes(room_w)
+        for row in range(room_y, room_y + room_h):
+            start = row * tiles.width + room_x
+            tiles.tiles[start : start + room_w] = floor
+        return room_x + room_w // 2, room_y + room_h // 2
+
+    def carve_corridor(self, tiles: TileMap, rng: random.Random, start: tuple, end: tuple) -> None:
+        (x1, y1), (x2, y2) = start, end
+        # Losowo najpierw poziomo albo najpierw pionowo
+        corner = (x2, y1) if rng.random() < 0.5 else (x1, y2)
+        for (ax, ay), (bx, by) in ((start, corner), (corner, end)):
+            if ay == by:
+                left, right = min(ax, bx), max(ax, bx)
+                tiles.tiles[ay * tiles.width + left : ay * tiles.width + right + 1] = bytes(right - left + 1)
+            else:
+                top, bottom = min(ay, by), max(ay, by)
+                start_index = top * tiles.width + ax
+                tiles.tiles[start_index : bottom * tiles.width + ax + 1 : tiles.width] = bytes(bottom - top + 1)
+
+
+class CaveGenerator(Generator):
+    """Cellular-automata caves.
+
+    The wall mask of the whole map is one Python int (bit y * width + x), so every
+    smoothing pass is a handful of shifts and bitwise ops over all cells at once;
+    neighbour counts are summed in bit-sliced counters. Only the largest
+    connected cave is kept, so every floor cell is reachable.
+    """
+
+    def __init__(self, fill: float = 0.45, passes: int = 4, precision: int = 8):
+        self.fill = fill
+        self.passes = passes
+        self.precision = precision
+
+    def random_mask(self, bits: int, rng: random.Random) -> int:
+        """Maska, w której każdy bit jest ustawiony z prawdopodobieństwem self.fill"""
+        digits = [(int(self.fill * 2**self.precision) >> shift) & 1 for shift in range(self.precision)]
+        mask = 0
+        # Od najmłodszej cyfry dwójkowej: OR podnosi, AND obniża prawdopodobieństwo
+        for digit in digits:
+            sample = rng.getrandbits(bits)
+            mask = (sample | mask) if digit else (sample & mask)
+        return mask
+
+    def border_mask(self, width: int, height: int) -> int:
+        row = (1 << width) - 1
+        # Skrajne kolumny: wzór jednego wiersza powielony mnożeniem przez 1 + 2^w + 2^2w + ...
+        every_row = ((1 << (width * height)) - 1) // row
+        edges = (1 | (1 << (width - 1))) * every_row
+        return edges | row | (row << ((height - 1) * width))
+
+    def smooth(self, walls: int, width: int, full: int, border: int) -> int:
+        """Jeden krok automatu: ściana przy >= 5 sąsiednich ścianach, podłoga przy <= 3"""
+        neighbours = (
+            walls << 1,
+            walls >> 1,
+            walls << width,
+            walls >> width,
+            walls << (width + 1),
+            walls << (width - 1),
+            walls >> (width + 1),
+            walls >> (width - 1),
+        )
+        c0 = c1 = c2 = c3 = 0
+        for carry in neighbours:
+            c0, carry = c0 ^ carry, c0 & carry
+            c1, carry = c1 ^ carry, c1 & carry
+            c2, carry = c2 ^ carry, c2 & carry
+            c3 |= carry
+        at_least_five = c3 | (c2 & (c1 | c0))
+        exactly_four = c2 & ~(c3 | c1 | c0)
+        return ((at_least_five | (walls & exactly_four)) & full) | border
+
+    def generate(self, width: int, height: int, rng: random.Random) -> TileMap:
+        cells = width * height
+        full = (1 << cells) - 1
+        border = self.border_mask(width, height)
+        walls = self.random_mask(cells, rng) | border
+        for _ in range(self.passes):
+            walls = self.smooth(walls, width, full, border)
+
+        tiles = TileMap(width, height)
+        packed = walls.to_bytes((cells + 7) // 8, "little")
+        tiles.tiles[:] = b"".join(map(UNPACK_BITS.__getitem__, packed))[:cells]
+        keep_largest_region(tiles)
+        return tiles
+
+
+def keep_largest_region(tiles: TileMap) -> None:
+    """Zamuruj wszystkie obszary podłogi poza największym spójnym (4-sąsiedztwo).
+
+    Union-find over horizontal floor runs instead of single cells.
+    """
+    width = tiles.width
+    parent: list[int] = []
+    sizes: list[int] = []
+    rows: list[list[tuple[int, int, int]]] = []  # Odcinki (początek, koniec, numer) kolejnych wierszy
+
+    def find(run: int) -> int:
+        while parent[run] != run:
+            parent[run] = parent[parent[run]]
+            run = parent[run]
+        return run
+
+    previous: list[tuple[int, int, int]] = []
+    for y in range(tiles.height):
+        current = []
+        row = bytes(tiles.row(y))
+        above = 0
+        for match in FLOOR_RUN.finditer(row):
+            start, end = match.span()
+            run = len(parent)
+            parent.append(run)
+            sizes.append(end - start)
+            current.append((start, end, run))
+            # Połącz z odcinkami z wiersza powyżej, które się nakładają
+            while above < len(previous) and previous[above][1] <= start:
+                above += 1
+            index = above
+            while index < len(previous) and previous[index][0] < end:
+                root_a, root_b = find(run), find(previous[index][2])
+                if root_a != root_b:
+                    parent[root_b] = root_a
+                    sizes[root_a] += sizes[root_b]
+                index += 1
+        rows.append(current)
+        previous = current
+
+    if not parent:
+        return
+    largest = max(range(len(parent)), key=lambda run: sizes[run] if parent[run] == run else -1)
+    for y, runs in enumerate(rows):
+        for start, end, run in runs:
+            if find(run) != largest:
+                tiles.tiles[y * width + start : y * width + end] = bytes([Tile.WALL]) * (end - start)
+
+
+GENERATORS = {
+    "open": OpenGenerator,
+    "bsp": BSPGenerator,
+    "caves": CaveGenerator,
+}
+
+
+def get_generator(name: str) -> Generator:
+    """Generator lochu o podanej nazwie"""
+    if name not in GENERATORS:
+        raise ValueError(f"Unknown dungeon generator: {name} (available: {', '.join(GENERATORS)})")
+    return GENERATORS[name]()
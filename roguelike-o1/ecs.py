@@ -0,0 +1,253 @@
+"""Entity-component-system: komponenty w spakowanych tablicach, systemy i harmonogram z pomiarem czasu"""
+
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+
+# Wiersz usuniętej encji po compact() - odczyt przez jej uchwyt kończy się IndexError
+DEAD = 2**31 - 1
+
+
+def column_property(name: str) -> property:
+    """Atrybut uchwytu czytany i zapisywany w kolumnie name, w bieżącym wierszu encji"""
+    column = attrgetter(name)
+
+    def get(handle):
+        table = handle.table
+        return column(table)[table.rows[handle.id]]
+
+    def set(handle, value):
+        table = handle.table
+        column(table)[table.rows[handle.id]] = value
+
+    return property(get, set)
+
+
+class ComponentArrays:
+    """Entities of one kind as rows of packed arrays, one array per component field.
+
+    Subclasses give their fields as (name, typecode) pairs - each field is
+    an array attribute of the same name - and the handle class. Every
+    entity gets an id, its position in the rows index; the table keeps no
+    object per entity. A handle (see column_property) is a small object made
+    on demand from the id, so it stays valid while rows move, and indexes
+    such as spatial.OccupancyGrid store ids rather than handles.
+
+    Rows keep insertion order: systems walk the columns in the same order
+    every turn, which seeded games rely on. remove() only marks a row;
+    compact() cuts all marked rows out at once, shifting the rows after
+    them, and is meant to run once per turn before the systems (until then
+    the columns still hold the removed rows). Values missing from add() are
+    zero.
+    """
+
+    fields: tuple[tuple[str, str], ...] = ()
+    handle: type["Handle"]
+
+    def __init__(self):
+        for name, typecode in self.fields:
+            setattr(self, name, array(typecode))
+        self.ids = array("i")  # Id encji w każdym wierszu
+        self.rows = array("i")  # Wiersz encji o danym id (DEAD po usunięciu i compact)
+        self.removed = []  # Wiersze usunięte, czekające na compact()
+
+    def columns(self) -> list:
+        return [getattr(self, name) for name, _ in self.fields]
+
+    def __len__(self) -> int:
+        return len(self.ids) - len(self.removed)
+
+    def __iter__(self):
+        self.compact()
+        entity = self.entity
+        return (entity(id) for id in self.ids.tolist())
+
+    def __getitem__(self, index: int):
+        self.compact()
+        return self.entity(self.ids[index])
+
+    def entity(self, id: int):
+        """Uchwyt encji o danym id"""
+        handle = self.handle.__new__(self.handle)
+        handle.table, handle.id = self, id
+        return handle
+
+    def nbytes(self) -> int:
+        """Przybliżony rozmiar w pamięci: kolumny i indeks wierszy"""
+        return sum(column.itemsize * len(column) for column in (*self.columns(), self.ids, self.rows))
+
+    def add(self, *values):
+        """Nowa encja; zwraca jej uchwyt"""
+        columns = self.columns()
+        for column, value in zip(columns, values):
+            column.append(value)
+        for column in columns[len(values) :]:
+            column.append(0)
+        id = len(self.rows)
+        self.rows.append(len(self.ids))
+        self.ids.append(id)
+        return self.entity(id)
+
+    def extend(self, columns: list) -> range:
+        """Dopisz wiele encji naraz - kolumny w kolejności fields (brakujące końcowe są zerami); zwraca ich id"""
+        start, first_id = len(self.ids), len(self.rows)
+        count = len(columns[0]) if columns else 0
+        for column, values in zip(self.columns(), columns):
+            column.extend(values)
+        for column in self.columns()[len(columns) :]:
+            column.extend([0] * count)
+        self.rows.extend(range(start, start + count))
+        self.ids.extend(range(first_id, first_id + count))
+        return range(first_id, first_id + count)
+
+    def remove(self, handle) -> None:
+        """Usuń encję; jej wiersz (i odczyt przez uchwyt) zostaje do najbliższego compact()"""
+        self.removed.append(self.rows[handle.id])
+
+    def compact(self) -> None:
+        """Wytnij wiersze usuniętych encji, zachowując kolejność pozostałych"""
+        removed = self.removed
+        if not removed:
+            return
+        removed.sort(reverse=True)
+        ids, rows = self.ids, self.rows
+        for row in removed:
+            rows[ids[row]] = DEAD
+        for column in (*self.columns(), ids):
+            for row in removed:
+                del column[row]
+        for row in range(removed[-1], len(ids)):
+            rows[ids[row]] = row
+        removed.clear()
+
+    def copy(self):
+        """Niezależna kopia z tymi samymi id (także z usuniętymi jeszcze przed compact)"""
+        table = type(self).__new__(type(self))
+        for name, _ in self.fields:
+            setattr(table, name, getattr(self, name)[:])
+        table.ids, table.rows, table.removed = self.ids[:], self.rows[:], self.removed.copy()
+        return table
+
+
+class Handle:
+    """Base of entity handles: entity id of table (a ComponentArrays), now at row table.rows[id]"""
+
+    __slots__ = ("table", "id")
+    table: ComponentArrays
+    id: int
+
+    @property
+    def row(self) -> int:
+        return self.table.rows[self.id]
+
+    def values(self) -> list:
+        row = self.row
+        return [column[row] for column in self.table.columns()]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Handle) and other.table is self.table and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash((id(self.table), self.id))
+
+
+class System:
+    """One step of the simulation, run by a Scheduler over all entities at once.
+
+    reads and writes name the components and resources the system uses
+    (e.g. "position", "player", "rng.ai"). Two systems may run side by side
+    only when neither of them writes anything the other one reads or writes.
+    """
+
+    name = "system"
+    reads: tuple[str, ...] = ()
+    writes: tuple[str, ...] = ()
+
+    def run(self, world) -> None:
+        raise NotImplementedError
+
+    def conflicts(self, other: "System") -> bool:
+        writes, other_writes = set(self.writes), set(other.writes)
+        return not writes.isdisjoint(other.reads + other.writes) or not other_writes.isdisjoint(self.reads)
+
+
+def plan_stages(systems: tuple) -> tuple:
+    """Kolejne systemy pogrupowane w etapy: system dołącza do etapu, gdy nie koliduje z żadnym z jego systemów"""
+    stages: list[list[System]] = []
+    for system in systems:
+        if stages and not any(system.conflicts(other) for other in stages[-1]):
+            stages[-1].append(system)
+        else:
+            stages.append([system])
+    return tuple(tuple(stage) for stage in stages)
+
+
+class Scheduler:
+    """Runs systems in a fixed order, stage by stage.
+
+    A stage is a run of consecutive systems that do not conflict (see
+    System.conflicts). With workers > 1 the systems of a stage run on a
+    thread pool, which pays off for systems that release the GIL (drawing,
+    I/O); otherwise they run one after another in the given order. With a
+    profiler (profiler.Profiler) every system's run is timed as a phase
+    named after the system; without one the systems run untimed.
+    """
+
+    def __init__(self, systems, workers: int = 1, profiler=None):
+        self.systems = tuple(systems)
+        self.stages = plan_stages(self.systems)
+        self.workers = workers
+        self.profiler = profiler
+        self.pool: ThreadPoolExecutor | None = None
+
+    def add(self, system: System) -> None:
+        """Dołącz system na końcu kolejności"""
+        self.systems += (system,)
+        self.stages = plan_stages(self.systems)
+
+    def copy(self) -> "Scheduler":
+        """Harmonogram z tymi samymi systemami, etapami i profilerem (dla kopii gry)"""
+        scheduler = Scheduler.__new__(Scheduler)
+        scheduler.__dict__.update(self.__dict__)
+        scheduler.pool = None
+        return scheduler
+
+    def close(self) -> None:
+        """Zamknij pulę wątków etapów, jeśli powstała"""
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+            self.pool = None
+
+    def run(self, world) -> None:
+        if self.profiler is None and (self.workers <= 1 or len(self.stages) == len(self.systems)):
+            # Bez pomiaru i bez etapów do zrównoleglenia: po prostu kolejno
+            for system in self.systems:
+                system.run(world)
+            return
+        for stage in self.stages:
+            if len(stage) > 1 and self.workers > 1:
+                if self.pool is None:
+                    self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix="system")
+                for future in [self.pool.submit(self.run_system, system, world) for system in stage]:
+                    future.result()
+            elif self.profiler is None:
+                for system in stage:
+                    system.run(world)
+            else:
+                for system in stage:
+                    self.run_system(system, world)
+
+    def run_system(self, system: System, world) -> None:
+        if self.profiler is None:
+            system.run(world)
+            return
+        start = time.perf_counter()
+        try:
+            system.run(world)
+        finally:
+            self.profiler.record(system.name, start, time.perf_counter() - start)
+
+    def describe(self) -> list:
+        """Etapy jako listy nazw systemów"""
+        return [[system.name for system in stage] for stage in self.stages]
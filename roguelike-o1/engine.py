@@ -0,0 +1,839 @@
+"""Headless game core - logika gry bez pygame, ekranu i obrazków"""
+
+import random
+import threading
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum, IntEnum
+from typing import TYPE_CHECKING
+
+from ai import AISystem, MovementSystem
+from dungeon import Generator, get_generator
+from ecs import ComponentArrays, Handle, Scheduler, System, column_property
+from fov import FieldOfView
+from inventory import Inventory
+from pathfinding import FlowField
+from rng import RandomStreams, copy_stream
+from spatial import EMPTY, NEIGHBOUR_OFFSETS, OccupancyGrid
+from tables import POTION, TABLES
+from tilemap import CellSampler, Tile, TileMap
+
+if TYPE_CHECKING:
+    from replay import InputLog  # replay importuje engine
+
+# Definicje znaków
+PLAYER_CHAR = "@"
+WALL_CHAR = "#"
+FLOOR_CHAR = "."
+CHEST_CHAR = "C"
+GOBLIN_CHAR = "g"
+TROLL_CHAR = "T"
+DRAGON_CHAR = "D"
+STAIRS_DOWN_CHAR = ">"
+STAIRS_UP_CHAR = "<"
+
+# Konfiguracja gry
+MAP_WIDTH = 20
+MAP_HEIGHT = 13
+NUM_CHESTS = 5
+NUM_MONSTERS = 6
+MAX_MONSTERS = 30
+MAX_DUNGEON_LEVELS = 30
+DEFAULT_GENERATOR = "open"
+LAYOUT_ATTEMPTS = 20  # Ziarna mapy próbowane po kolei, gdy na podłodze nie mieści się cały poziom
+PREFETCH_DELAY = 0.05  # Opóźnienie (s) startu budowy następnego poziomu w tle po zejściu
+# Stan poziomu przenoszony z gotowego układu (LevelLayout) do gry
+LEVEL_STATE = (
+    "map",
+    "level_rng",
+    "free_cells",
+    "occupancy",
+    "flow",
+    "fov",
+    "next_uid",
+    "chests",
+    "monsters",
+    "stairs_down",
+)
+
+
+class ItemCategories(str, Enum):
+    """Enum dla kategorii przedmiotów"""
+
+    SWORD = "sword"
+    SPEAR = "spear"
+    AXE = "axe"
+    SHIELD = "shield"
+    BOOTS = "boots"
+    HELMET = "helmet"
+    POTION = "potion"
+
+
+# Archetypy potworów i tabele łupów (tables.toml)
+MONSTERS = TABLES.monsters
+LOOT = TABLES.loot
+
+
+class Action(IntEnum):
+    """Akcje gracza przyjmowane przez GameCore.step()"""
+
+    WAIT = 0
+    UP = 1
+    DOWN = 2
+    LEFT = 3
+    RIGHT = 4
+    ATTACK = 5
+
+
+ACTION_DELTAS = {
+    Action.UP: (0, -1),
+    Action.DOWN: (0, 1),
+    Action.LEFT: (-1, 0),
+    Action.RIGHT: (1, 0),
+}
+
+
+class Entity:
+    """Klasa bazowa postaci z własnymi polami (gracz); potwory to wiersze tablic Monsters"""
+
+    __slots__ = ("x", "y", "hp", "max_hp")
+
+    def __init__(self, x, y, hp):
+        self.x = x
+        self.y = y
+        self.hp = hp
+        self.max_hp = hp
+
+
+class Item:
+    """Klasa reprezentująca przedmioty w grze"""
+
+    __slots__ = ("name", "category", "attack", "defense", "healing", "equipped")
+
+    def __init__(self, name, category, attack=0, defense=0, healing=0):
+        self.name = name
+        self.category = category  # 'sword', 'spear', 'axe', 'shield', 'boots', 'helmet', 'potion'
+        self.attack = attack
+        self.defense = defense
+        self.healing = healing
+        self.equipped = False
+
+    @property
+    def sprite(self) -> str:
+        return self.category
+
+    def copy(self) -> "Item":
+        item = Item(self.name, self.category, self.attack, self.defense, self.healing)
+        item.equipped = self.equipped
+        return item
+
+    @property
+    def total(self) -> int:
+        """Total stat value"""
+        return self.attack + self.defense + self.healing
+
+    def __str__(self):
+        if self.category == "potion":
+            return f"{self.name} (Leczy {self.healing} HP)"
+        else:
+            return f"{self.name} ({self.category}) [Atk: {self.attack}, Def: {self.defense}]"
+
+
+class Player(Entity):
+    """Klasa reprezentująca postać gracza"""
+
+    __slots__ = ("sprite", "name", "attack", "defense", "inventory", "equipped", "exp", "level")
+
+    def __init__(self, x, y, rng=random):
+        super().__init__(x, y, 100)  # Maksymalne punkty życia
+        self.sprite = "player"
+        self.name = "Rycerz"
+        self.attack = rng.randint(0, 5)
+        self.defense = rng.randint(0, 5)
+        self.inventory = Inventory()
+        self.equipped = self.inventory.equipped  # {'sword': item, 'shield': item, ...}
+        self.exp = 0
+        self.level = 1
+
+    def copy(self) -> "Player":
+        """Kopia gracza; ekwipunek dzieli z oryginałem przedmioty do czasu ich zmiany"""
+        player = Player.__new__(Player)
+        for name in Entity.__slots__ + Player.__slots__:
+            setattr(player, name, getattr(self, name))
+        player.inventory = self.inventory.fork()
+        player.equipped = player.inventory.equipped
+        return player
+
+    def total_attack(self) -> int:
+        """Zwraca całkowitą wartość ataku, łącznie z wyposażonymi przedmiotami"""
+        return self.attack + self.inventory.attack
+
+    def total_defense(self) -> int:
+        """Zwraca całkowitą wartość obrony, łącznie z wyposażonymi przedmiotami"""
+        return self.defense + self.inventory.defense
+
+    def check_level_up(self) -> bool:
+        """Sprawdza, czy gracz zdobył wystarczająco doświadczenia do awansu"""
+        required_exp = self.level * 1000
+        if self.exp >= required_exp:
+            self.level += 1
+            self.attack += 1
+            self.defense += 1
+            return True
+
+        return False
+
+
+class Monster(Handle):
+    """Potwór - uchwyt wiersza tablic Monsters: pozycja, życie i rodzaj; statystyki rodzaju są w tablicach MONSTERS"""
+
+    __slots__ = ()
+
+    x = column_property("x")
+    y = column_property("y")
+    kind = column_property("kind")
+    hp = column_property("hp")
+    max_hp = column_property("max_hp")
+    uid = column_property("uid")  # Kolejność pojawienia się na poziomie
+
+    @property
+    def name(self) -> str:
+        return MONSTERS.names[self.kind]
+
+    @property
+    def sprite(self) -> str:
+        return MONSTERS.sprites[self.kind]
+
+    @property
+    def attack(self) -> int:
+        return MONSTERS.attack[self.kind]
+
+    @property
+    def defense(self) -> int:
+        return MONSTERS.defense[self.kind]
+
+    @property
+    def exp_value(self) -> int:
+        return MONSTERS.exp[self.kind]
+
+
+class Monsters(ComponentArrays):
+    """Monsters of a level as packed columns, in the order they appeared.
+
+    Components: position (x, y), health (hp, max_hp), kind and uid, plus
+    the move intent written each turn by the AI system for the movement
+    system (dx, dy, steps, chase). Systems work on the columns directly;
+    Monster handles serve code that deals with single monsters.
+    """
+
+    fields = (
+        ("x", "i"),
+        ("y", "i"),
+        ("kind", "i"),
+        ("hp", "i"),
+        ("max_hp", "i"),
+        ("uid", "i"),
+        ("dx", "b"),
+        ("dy", "b"),
+        ("steps", "b"),
+        ("chase", "b"),
+    )
+    handle = Monster
+    # Kolumny tworzy ComponentArrays.__init__ z fields - tu tylko ich typy
+    x: "array[int]"
+    y: "array[int]"
+    kind: "array[int]"
+    hp: "array[int]"
+    max_hp: "array[int]"
+    uid: "array[int]"
+    dx: "array[int]"
+    dy: "array[int]"
+    steps: "array[int]"
+    chase: "array[int]"
+
+
+@dataclass
+class GameState:
+    """Snapshot stanu gry zwracany przez GameCore.step()"""
+
+    x: int
+    y: int
+    hp: int
+    exp: int
+    player_level: int
+    stage: int
+    monsters: int
+    inventory: int
+    dead: bool
+    won: bool
+
+    @property
+    def done(self) -> bool:
+        """Gra zakończona (śmierć lub wygrana)"""
+        return self.dead or self.won
+
+
+class LootSystem(System):
+    """Gracz zabiera zawartość skrzyni, na której stoi"""
+
+    name = "loot"
+    reads = ("level",)
+    writes = ("chests", "player")
+
+    def run(self, game) -> None:
+        player = game.player
+        chest = (player.x, player.y)
+        if chest in game.chests:
+            player.inventory.add(game.chests.pop(chest))
+
+
+class StairsSystem(System):
+    """Zmiana poziomu, gdy gracz wszedł na schody (stojąc na nich po zmianie poziomu, nigdzie nie idzie)"""
+
+    name = "stairs"
+    reads = ("level", "player")
+    writes = ("level", "player")
+
+    def run(self, game) -> None:
+        if not game.player_entered:
+            return
+        position = (game.player.x, game.player.y)
+        if position == game.stairs_down:
+            if game.level < MAX_DUNGEON_LEVELS:
+                game.change_level(game.level + 1)
+            else:
+                game.won = True
+        elif position == game.stairs_up:
+            game.change_level(game.level - 1)
+
+
+class CombatSystem(System):
+    """Potwory sąsiadujące z graczem atakują go, jeśli w tej turze się nie ruszył"""
+
+    name = "combat"
+    reads = ("level", "position", "occupancy")
+    writes = ("player", "rng.combat")
+
+    def run(self, game) -> None:
+        if game.player_moved:
+            return
+        player, roll = game.player, game.rng.combat.random
+        for monster in game.adjacent_monsters():
+            defence = player.total_defense()
+            # Critical hit, ignore defense
+            if roll() < 0.1:
+                defence = 0
+
+            damage = max(1, monster.attack - defence)
+
+            # Player : Get damage
+            player.hp -= damage
+            if player.hp <= 0:
+                game.dead = True
+                break
+
+
+def random_items(count: int, dungeon_level: int, rng: random.Random, exp_value: int = 0) -> list:
+    """count przedmiotów; kategorie losowane jednym przebiegiem z tabeli łupów"""
+    items = []
+    for kind in LOOT.sampler(dungeon_level).sample_many(count, rng):
+        category = LOOT.categories[kind]
+        if kind == POTION:
+            healing = LOOT.healing + rng.randint(0, dungeon_level * LOOT.healing_per_level)
+            items.append(Item(LOOT.potion_name, category, healing=healing))
+            continue
+
+        max_primary_bonus = min(
+            rng.randint(LOOT.bonus_min, LOOT.bonus_max) + dungeon_level + exp_value // LOOT.exp_divisor,
+            LOOT.bonus_cap,
+        )
+        max_secondary_bonus = max_primary_bonus // 2
+
+        weapon = LOOT.primary[kind] == "attack"
+        attack = rng.randint(1, max_primary_bonus) if weapon else rng.randint(0, max_secondary_bonus)
+        defense = rng.randint(0, max_secondary_bonus) if weapon else rng.randint(1, max_primary_bonus)
+        name = f"{category.capitalize()} +{attack + defense}"
+        items.append(Item(name, category, attack, defense))
+    return items
+
+
+class Placement:
+    """Stawianie obiektów na wolnych polach poziomu - wspólne dla budowy układu (LevelLayout) i gry (GameCore)"""
+
+    width: int
+    level: int
+    map: TileMap
+    level_rng: random.Random
+    free_cells: CellSampler | None
+    monsters: Monsters
+    occupancy: OccupancyGrid
+    next_uid: int
+    chests: dict
+    stairs_down: tuple[int, int]
+    stairs_up: tuple[int, int] | None
+
+    def spawn_monsters(self, amount: int) -> None:
+        """Umieść na wolnych polach podaną liczbę nowych potworów (rodzaje losowane razem, wiersze dopisywane naraz)"""
+        kinds = MONSTERS.sampler(self.level).sample_many(amount, self.level_rng)
+        xs, ys, hps = [], [], []
+        # Pole i życie losowane na przemian, jak przy create_monster potwór po potworze
+        for kind in kinds:
+            x, y = self.get_random_floor_position()
+            xs.append(x)
+            ys.append(y)
+            hps.append(self.roll_hp(kind))
+        uids = range(self.next_uid, self.next_uid + len(kinds))
+        self.next_uid += len(kinds)
+        self.occupancy.add_ids(self.monsters.extend([xs, ys, kinds, hps, hps, uids]), xs, ys)
+
+    def create_monster(self, x: int, y: int, kind: int | None = None) -> Monster:
+        """Nowy potwór na polu (x, y) poziomu, podanego rodzaju albo wylosowanego według tabeli dla poziomu lochu"""
+        if kind is None:
+            kind = MONSTERS.sampler(self.level).sample(self.level_rng)
+        hp = self.roll_hp(kind)
+        monster = self.monsters.add(x, y, kind, hp, hp, self.next_uid)
+        self.next_uid += 1
+        self.occupancy.add(monster)
+        return monster
+
+    def roll_hp(self, kind: int) -> int:
+        return self.level_rng.randint(MONSTERS.hp_min[kind], MONSTERS.hp_max[kind])
+
+    def reserved_cells(self) -> set[int]:
+        """Indeksy pól skrzyń i obu schodów - żadna postać nie jest na nich stawiana"""
+        stairs = [position for position in (self.stairs_down, self.stairs_up) if position is not None]
+        return {y * self.width + x for x, y in (*self.chests, *stairs)}
+
+    def get_random_floor_position(self) -> tuple[int, int]:
+        if self.free_cells is None:
+            # Po wczytaniu albo skopiowaniu gry: wolne pola to podłoga bez postaci, skrzyń i schodów
+            taken = self.reserved_cells()
+            cells = self.occupancy.cells
+            free = [cell for cell in self.map.cells_of(Tile.FLOOR) if cells[cell] == EMPTY and cell not in taken]
+            self.free_cells = CellSampler(free, self.width, self.level_rng)
+        return self.free_cells.sample()
+
+
+class LevelLayout(Placement):
+    """Freshly generated level: map, chests, monsters, stairs down and a cell for the player.
+
+    Everything comes from the arguments: the map generator and size, the game
+    seed, the level number and the level's own random stream. The layout does
+    not touch a game, so it can be built ahead of time on another thread and
+    gives the same level as building it on descent.
+    """
+
+    def __init__(
+        self,
+        generator: Generator,
+        width: int,
+        height: int,
+        seed: int,
+        level: int,
+        level_rng: random.Random,
+        max_monsters: int = MAX_MONSTERS,
+    ):
+        self.generator = generator
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.level = level
+        self.max_monsters = max_monsters
+        self.stairs_up = None  # Schody w górę to pole gracza - ustawia je gra
+
+        monsters_amount = min(NUM_MONSTERS + level, max_monsters)
+        self.map, floor = self.generate_map(NUM_CHESTS + monsters_amount + 2)
+        # Gdy nawet najlepsza mapa jest za ciasna, skrzyń i potworów jest tyle, ile zmieści się obok gracza i schodów
+        chests_amount = min(NUM_CHESTS, len(floor) - 2)
+        monsters_amount = min(monsters_amount, len(floor) - 2 - chests_amount)
+        self.level_rng = level_rng
+        # Wolne pola losujemy bez powtórzeń, więc obiekty nigdy na siebie nie trafią
+        self.free_cells = CellSampler(floor, width, level_rng)
+        self.monsters = Monsters()
+        self.occupancy = OccupancyGrid(width, height, self.monsters)
+        self.flow = FlowField(self.map)
+        self.fov = FieldOfView(self.map)
+        self.next_uid = 0
+
+        # Umieść losowo skrzynie, ich zawartość losowana od razu jednym przebiegiem
+        self.chests = {}
+        for item in random_items(chests_amount, level, level_rng):
+            self.chests[self.get_random_floor_position()] = item
+
+        # Umieść losowo potwory
+        self.spawn_monsters(monsters_amount)
+
+        # Pole gracza losowane przed schodami, jak przy budowie poziomu razem z graczem
+        self.player_position = self.get_random_floor_position()
+
+        # Umieść schody w dół
+        self.stairs_down = self.get_random_floor_position()
+
+    def level_seed(self) -> int:
+        """Deterministyczne ziarno układu poziomu"""
+        return (self.seed << 32) + self.level
+
+    def generate_map(self, needed: int) -> tuple[TileMap, list[int]]:
+        """Mapa poziomu i lista jej pól podłogi, jeśli się da - z co najmniej needed polami.
+
+        Caves keep only their largest cave and small maps have little room, so
+        a map may not fit everything. Then the next seeds are tried, up to
+        LAYOUT_ATTEMPTS maps, and the one with the most floor is used. The
+        first seed depends only on the game seed and the level, so levels that
+        fit keep their layout.
+        """
+        best = None
+        for attempt in range(LAYOUT_ATTEMPTS):
+            rng = random.Random(self.level_seed() + (attempt << 16))
+            tiles = self.generator.generate(self.width, self.height, rng)
+            floor = tiles.cells_of(Tile.FLOOR)
+            if best is None or len(floor) > len(best[1]):
+                best = (tiles, floor)
+            if len(floor) >= needed:
+                break
+        assert best is not None
+        if len(best[1]) < 2:
+            raise ValueError(f"No room for the player and stairs on a {self.width}x{self.height} map")
+        return best
+
+
+class GameCore(Placement):
+    """Logika gry bez warstwy prezentacji, sterowana przez step(action)"""
+
+    # Czy budować następny poziom w tle, podczas gry na bieżącym (włączane przez frontend)
+    prefetch_levels = False
+    # Systemy tury (update) w kolejności wykonania; ruch potworów to AI i ruch na kolumnach Monsters
+    systems: tuple[System, ...] = (LootSystem(), StairsSystem(), AISystem(), MovementSystem(), CombatSystem())
+    # Mapa odległości i pole widzenia bieżącego poziomu (LEVEL_STATE, przenoszone z układu)
+    flow: FlowField
+    fov: FieldOfView
+
+    def __init__(
+        self,
+        width: int = MAP_WIDTH,
+        height: int = MAP_HEIGHT,
+        max_monsters: int = MAX_MONSTERS,
+        generator: str = DEFAULT_GENERATOR,
+        seed: int | None = None,
+        generate: bool = True,
+        levels=None,
+    ):
+        """generate=False pomija tworzenie pierwszego poziomu (stan zostanie np. wczytany z zapisu).
+
+        levels is an optional levels.LevelStore: with it the dungeon is
+        persistent - levels get stairs up and the ones left behind are kept
+        in the store instead of being thrown away.
+        """
+        self.width = width
+        self.height = height
+        self.max_monsters = max_monsters
+        self.generator_name = generator
+        self.generator = get_generator(generator)
+        # Ziarno gry: ten sam seed i te same akcje dają dokładnie tę samą rozgrywkę
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.rng = RandomStreams(self.seed)
+        self.log: InputLog | None = None  # Opcjonalny dziennik akcji gracza
+        self.level = 1
+        self.running = True
+        self.dead = False
+        self.won = False
+        self.player_moved = False
+        self.steps = 0
+        # Wątek budujący następny poziom, tworzony przy pierwszym użyciu
+        self.level_worker: ThreadPoolExecutor | None = None
+        # (numer poziomu, Event przyspieszający, Future z układem) budowany w tle
+        self.next_level: tuple[int, threading.Event, Future] | None = None
+        self.levels = levels
+        self.stairs_up = None  # Tylko w trwałym lochu (z magazynem poziomów), od poziomu 2
+        self.player_entered = False  # Gracz wszedł w tej turze na nowe pole
+        self.scheduler = Scheduler(self.systems)
+        if generate:
+            self.generate_level()
+
+    @property
+    def done(self) -> bool:
+        """Gra zakończona (śmierć lub wygrana)"""
+        return self.dead or self.won
+
+    def generate_level(self):
+        """Przejdź na poziom self.level: weź układ zbudowany w tle albo zbuduj go teraz"""
+        layout = self.take_next_level() or self.build_level(self.level)
+        # Zwolnienie starego poziomu (duże listy i tablice) też może trwać - przy budowie w tle robi to wątek
+        previous = [getattr(self, name, None) for name in LEVEL_STATE] if self.prefetch_levels else None
+        for name in LEVEL_STATE:
+            setattr(self, name, getattr(layout, name))
+        # Gracz zaczyna poziom na schodach w górę, więc wraca nimi tam, skąd przyszedł
+        x, y = layout.player_position
+        self.stairs_up = (x, y) if self.levels is not None and self.level > 1 else None
+
+        # Umieść gracza
+        if hasattr(self, "player"):
+            # Zachowaj ekwipunek i statystyki
+            self.player.x, self.player.y = x, y
+        else:
+            self.player = Player(x, y, self.rng.player)
+        self.occupancy.add(self.player)
+        self.enter_level()
+        if previous is not None:
+            self.worker().submit(previous.clear)
+        self.prefetch_next_level()
+
+    def build_level(self, level: int) -> LevelLayout:
+        """Układ poziomu level - bez gracza, więc nie zmienia self; zależy tylko od ziarna gry i numeru poziomu"""
+        return LevelLayout(
+            self.generator, self.width, self.height, self.seed, level, self.rng.level(level), self.max_monsters
+        )
+
+    def change_level(self, level: int) -> None:
+        """Przejdź na poziom level; odwiedzony wraca z magazynu poziomów taki, jakim go zostawiono"""
+        if self.levels is None:
+            self.level = level
+            self.generate_level()
+            return
+        arrival = "stairs_up" if level > self.level else "stairs_down"
+        self.levels.put(self.level, self.store_level())
+        self.level = level
+        state = self.levels.take(level)
+        if state is None:
+            self.generate_level()
+        else:
+            self.restore_level(state, arrival)
+
+    def store_level(self) -> dict:
+        """Stan bieżącego poziomu bez gracza, do przechowania w magazynie poziomów.
+
+        Cached fields of view and the free cell pool are dropped: they are
+        rebuilt on demand, and a level restored from its packed form (see
+        savegame.pack_level) must behave exactly like one kept as objects.
+        """
+        self.occupancy.remove(self.player)
+        self.fov.invalidate()
+        state = {name: getattr(self, name) for name in LEVEL_STATE}
+        state["free_cells"] = None
+        state["stairs_up"] = self.stairs_up
+        return state
+
+    def restore_level(self, state: dict, arrival: str) -> None:
+        """Wróć na poziom z magazynu; gracz staje na schodach arrival ("stairs_up" albo "stairs_down")"""
+        self.discard_next_level()
+        for name in LEVEL_STATE:
+            setattr(self, name, state[name])
+        self.stairs_up = state["stairs_up"]
+        self.player.x, self.player.y = self.free_cell_near(*getattr(self, arrival))
+        self.occupancy.add(self.player)
+        self.enter_level()
+        self.prefetch_next_level()
+
+    def free_cell_near(self, x: int, y: int) -> tuple:
+        """Pole (x, y), a gdy stoi na nim potwór - wolne pole obok albo dowolne wolne pole podłogi.
+
+        Neighbours holding a chest or stairs are skipped, so the player never
+        lands on an unopened chest or on the other stairs of the level.
+        """
+        reserved = self.reserved_cells()
+        reserved.discard(y * self.width + x)  # Same schody przybycia są dozwolone
+        for dx, dy in NEIGHBOUR_OFFSETS[4:] + NEIGHBOUR_OFFSETS[:4]:
+            nx, ny = x + dx, y + dy
+            if not self.map.is_wall(nx, ny) and not self.is_occupied(nx, ny) and ny * self.width + nx not in reserved:
+                return nx, ny
+        return self.get_random_floor_position()
+
+    def prefetch_next_level(self) -> None:
+        """Zacznij budować w tle następny poziom, jeśli gra tego chce i taki poziom jeszcze nie istnieje"""
+        level = self.level + 1
+        if not self.prefetch_levels or level > MAX_DUNGEON_LEVELS:
+            return
+        if self.levels is not None and level in self.levels:
+            return
+        self.prefetch_level(level)
+
+    def prefetch_level(self, level: int) -> None:
+        """Zacznij budować układ poziomu level w tle"""
+        hurry = threading.Event()
+        self.next_level = (level, hurry, self.worker().submit(self.build_level_later, level, hurry))
+
+    def worker(self) -> ThreadPoolExecutor:
+        if self.level_worker is None:
+            self.level_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="level")
+        return self.level_worker
+
+    def build_level_later(self, level: int, hurry: threading.Event) -> LevelLayout:
+        # Wątek ustępuje na chwilę, żeby pierwsza klatka nowego poziomu nie dzieliła z nim GIL;
+        # hurry przerywa czekanie, gdy gracz schodzi niżej, zanim poziom powstał
+        hurry.wait(PREFETCH_DELAY)
+        return self.build_level(level)
+
+    def take_next_level(self) -> LevelLayout | None:
+        """Układ zbudowany w tle dla bieżącego poziomu (czekając, jeśli jeszcze nie gotowy) albo None"""
+        if self.next_level is None:
+            return None
+        level, hurry, future = self.next_level
+        self.next_level = None
+        hurry.set()
+        if level != self.level:
+            future.cancel()
+            return None
+        return future.result()
+
+    def discard_next_level(self) -> None:
+        """Porzuć układ budowany w tle - gracz wrócił na poziom, który już zna"""
+        if self.next_level is not None:
+            _, hurry, future = self.next_level
+            self.next_level = None
+            hurry.set()
+            future.cancel()
+
+    def close(self) -> None:
+        """Porzuć poziom budowany w tle i zamknij wątki gry (bez czekania na nie)"""
+        self.discard_next_level()
+        if self.level_worker is not None:
+            self.level_worker.shutdown(wait=False)
+            self.level_worker = None
+        self.scheduler.close()
+
+    def enter_level(self) -> None:
+        """Wywoływane, gdy poziom jest gotowy - wygenerowany, wczytany z zapisu albo skopiowany"""
+
+    def snapshot(self) -> "GameCore":
+        """Niezależna kopia gry do rozgałęziania przez boty i testy.
+
+        The map never changes once generated, so copies share it; the field
+        of view cache and inventory items are shared copy-on-write. Only small
+        mutable state is copied: monsters, player, occupancy, chests, the
+        distance and explored maps and the RNG streams.
+        """
+        game = object.__new__(type(self))
+        game.__dict__.update(self.__dict__)
+        game.rng = self.rng.copy()
+        game.level_rng = copy_stream(self.level_rng)
+        game.free_cells = None  # Odtworzone przy pierwszym losowaniu pola
+        game.player = self.player.copy()
+        game.monsters = self.monsters.copy()
+        game.occupancy = self.occupancy.copy(game.monsters, [game.player])
+        game.chests = self.chests.copy()
+        game.flow = self.flow.copy()
+        game.fov = self.fov.copy()
+        game.scheduler = self.scheduler.copy()
+        game.log = None
+        game.next_level = None  # Układ z tła należy do oryginału; kopia zbuduje swój przy zejściu
+        game.level_worker = None  # Tak samo wątek - close() kopii nie zamyka go oryginałowi
+        if self.levels is not None:
+            game.levels = self.levels.copy()
+        return game
+
+    def generate_random_item(self, dungeon_level: int, exp_value: int = 0) -> Item:
+        """Generuje losowy przedmiot na podstawie wartości doświadczenia potwora"""
+        return self.generate_random_items(1, dungeon_level, exp_value)[0]
+
+    def generate_random_items(self, count: int, dungeon_level: int, exp_value: int = 0, rng=None) -> list:
+        """count przedmiotów ze strumienia łupów gry (albo z rng)"""
+        return random_items(count, dungeon_level, self.rng.loot if rng is None else rng, exp_value)
+
+    def step(self, action: Action) -> GameState:
+        """Wykonaj jedną turę gry dla podanej akcji i zwróć nowy stan"""
+        if self.log is not None:
+            self.log.step(action)
+        dx, dy = ACTION_DELTAS.get(action, (0, 0))
+        self.player_moved = dx != 0 or dy != 0
+        if action == Action.ATTACK:
+            self.attack()
+        self.move_player(dx, dy)
+        self.update()
+        self.steps += 1
+        return self.state()
+
+    def state(self) -> GameState:
+        """Zwraca aktualny stan gry"""
+        return GameState(
+            x=self.player.x,
+            y=self.player.y,
+            hp=self.player.hp,
+            exp=self.player.exp,
+            player_level=self.player.level,
+            stage=self.level,
+            monsters=len(self.monsters),
+            inventory=len(self.player.inventory),
+            dead=self.dead,
+            won=self.won,
+        )
+
+    def move_player(self, dx, dy):
+        new_x = self.player.x + dx
+        new_y = self.player.y + dy
+        self.player_entered = not self.map.is_wall(new_x, new_y) and not self.is_occupied(new_x, new_y)
+        if self.player_entered:
+            self.occupancy.move(self.player, new_x, new_y)
+
+    def adjacent_monsters(self) -> list:
+        """Potwory sąsiadujące z graczem, w kolejności pojawienia się na poziomie (rosnących id)"""
+        ids = self.occupancy.neighbour_ids(self.player.x, self.player.y)
+        if len(ids) > 1:
+            ids.sort()
+        entity = self.monsters.entity
+        return [entity(id) for id in ids]
+
+    def attack(self):
+        adjacent = self.adjacent_monsters()
+        if not adjacent:
+            return
+        monster = adjacent[0]
+        # Wiersz potwora w kolumnach Monsters - bez odczytów przez uchwyt
+        table, row = monster.table, monster.row
+        kind = table.kind[row]
+
+        # Monster defense, if critical hit, ignore defense
+        defence = MONSTERS.defense[kind]
+        if self.rng.combat.random() < 0.1:
+            defence = 0
+
+        # Damage calculation
+        damage = max(1, self.player.total_attack() - defence)
+        table.hp[row] -= damage
+
+        #  Check : Monster is dead
+        if table.hp[row] <= 0:
+            exp_value = MONSTERS.exp[kind]
+            self.player.exp += exp_value
+            # Sprawdź poziomowanie
+            if self.player.check_level_up():
+                pass  # Możesz dodać informację o awansie
+            # Drop przedmiot z 30% szansą
+            if self.rng.combat.random() < 0.3:
+                item = self.generate_random_item(dungeon_level=self.level, exp_value=exp_value)
+                self.player.inventory.add(item)
+            self.monsters.remove(monster)
+            self.occupancy.remove(monster)
+
+    def use_item(self, item: Item) -> None:
+        """Użyj mikstury albo załóż/zdejmij przedmiot"""
+        if self.log is not None:
+            self.log.use_item(self.player.inventory.index(item))
+        if item.category == "potion":
+            # Użyj mikstury
+            self.player.hp += item.healing
+            if self.player.hp > self.player.max_hp:
+                self.player.hp = self.player.max_hp
+            # Usuń miksturę z ekwipunku
+            self.player.inventory.remove(item)
+        elif item.equipped:
+            # Zdejmij przedmiot
+            self.player.inventory.unequip(item)
+        else:
+            # Załóż przedmiot, zdejmując ewentualnie poprzedni
+            self.player.inventory.equip(item)
+
+    def drop_item(self, item: Item) -> None:
+        """Wyrzuć przedmiot z ekwipunku (założony zostaje najpierw zdjęty)"""
+        if self.log is not None:
+            self.log.drop_item(self.player.inventory.index(item))
+        self.player.inventory.remove(item)
+
+    def update(self):
+        """Reszta tury po akcji gracza: skrzynie, schody, AI i ruch potworów, ich ataki - systemy z harmonogramu"""
+        # Potwory zabite w tej turze znikają z kolumn raz, zanim przejdą po nich systemy
+        self.monsters.compact()
+        self.scheduler.run(self)
+
+    def is_occupied(self, x, y):
+        return self.occupancy.is_occupied(x, y)
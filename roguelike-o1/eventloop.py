@@ -0,0 +1,59 @@
+"""Pętla zdarzeń blokująca na wejściu zamiast aktywnego odpytywania"""
+
+import time
+from collections import deque
+
+import pygame
+
+# Zdarzenia, które mogą zmienić stan gry lub wymagają przerysowania
+ALLOWED_EVENTS = [pygame.QUIT, pygame.KEYDOWN, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.USEREVENT]
+
+
+class EventLoop:
+    """Jeden planista dla wszystkich ekranów gry.
+
+    With fps=0 the loop blocks in pygame.event.wait() until something happens.
+    With fps>0 it polls at most fps times per second using pygame.time.Clock.
+    Screens are redrawn only after an event was handled.
+    """
+
+    def __init__(self, fps: int = 0):
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.pending: deque[pygame.event.Event] = deque()
+        self.idle_seconds = 0.0
+        self.started = time.perf_counter()
+        # Ruchy myszy itp. nie budzą pętli
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(ALLOWED_EVENTS)
+
+    def next_events(self) -> deque[pygame.event.Event]:
+        """Zwróć oczekujące zdarzenia, czekając na nie bez zużywania CPU"""
+        if not self.pending:
+            start = time.perf_counter()
+            if self.fps:
+                while not self.pending:
+                    self.clock.tick(self.fps)
+                    self.pending.extend(pygame.event.get())
+            else:
+                self.pending.append(pygame.event.wait())
+                self.pending.extend(pygame.event.get())
+            self.idle_seconds += time.perf_counter() - start
+        return self.pending
+
+    def run(self, draw, on_event) -> None:
+        """Rysuj przez draw() i przekazuj zdarzenia do on_event(), dopóki nie zwróci False.
+
+        Events left after on_event stops the loop stay queued for the next run().
+        """
+        draw()
+        while True:
+            events = self.next_events()
+            while events:
+                if not on_event(events.popleft()):
+                    return
+            draw()
+
+    def idle_ratio(self) -> float:
+        """Część czasu od startu spędzona na czekaniu na zdarzenia"""
+        return self.idle_seconds / max(time.perf_counter() - self.started, 1e-9)
@@ -0,0 +1,147 @@
+"""Pole widzenia gracza (recursive shadowcasting) z pamięcią odkrytych pól"""
+
+import copy
+from collections import OrderedDict
+from functools import cache
+
+from tilemap import Tile, TileMap
+
+FOV_RADIUS = 20
+FOV_CACHE_SIZE = 256  # Liczba zapamiętanych pozycji gracza
+
+# Przekształcenia współrzędnych dla 8 oktantów (xx, xy, yx, yy)
+OCTANTS = [
+    (1, 0, 0, 1),
+    (0, 1, 1, 0),
+    (0, -1, 1, 0),
+    (-1, 0, 0, 1),
+    (-1, 0, 0, -1),
+    (0, -1, -1, 0),
+    (0, 1, -1, 0),
+    (1, 0, 0, -1),
+]
+
+
+class FieldOfView:
+    """Visible cells from the player's position, cached per position.
+
+    visible is a frozenset of cell indices (y * width + x); explored is a
+    bytearray bitmap (1 = seen at least once) that the renderer uses to skip
+    hidden parts of the map.
+    """
+
+    def __init__(self, tiles: TileMap, radius: int = FOV_RADIUS):
+        self.tiles = tiles
+        self.radius = radius
+        self.explored = bytearray(len(tiles.tiles))
+        self.visible: frozenset[int] = frozenset()
+        self.origin: tuple[int, int] | None = None
+        self.cache: OrderedDict[tuple[int, int], frozenset[int]] = OrderedDict()
+
+    def copy(self) -> "FieldOfView":
+        """Kopia z własną mapą odkrytych pól; zapamiętane pola widzenia są niezmienne i współdzielone"""
+        fov = copy.copy(self)
+        fov.explored = self.explored.copy()
+        fov.cache = self.cache.copy()
+        return fov
+
+    def invalidate(self) -> None:
+        """Mapa się zmieniła - zapomnij zapamiętane pola widzenia"""
+        self.cache.clear()
+        self.origin = None
+
+    def update(self, x: int, y: int) -> None:
+        """Przelicz pole widzenia, jeśli gracz zmienił pozycję"""
+        if self.origin == (x, y):
+            return
+        self.origin = (x, y)
+        visible = self.cache.get((x, y))
+        if visible is not None:
+            # Pola z pamięci podręcznej zostały już oznaczone jako odkryte
+            self.cache.move_to_end((x, y))
+            self.visible = visible
+            return
+        visible = frozenset(self.compute(x, y))
+        self.cache[(x, y)] = visible
+        if len(self.cache) > FOV_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        explored = self.explored
+        for index in visible:
+            explored[index] = 1
+        self.visible = visible
+
+    def is_visible(self, x: int, y: int) -> bool:
+        return y * self.tiles.width + x in self.visible
+
+    def is_explored(self, x: int, y: int) -> bool:
+        return self.explored[y * self.tiles.width + x] == 1
+
+    def compute(self, x: int, y: int) -> set:
+        width, height, radius = self.tiles.width, self.tiles.height, self.radius
+        origin = y * width + x
+        visible = {origin}
+        # Daleko od krawędzi mapy indeksy nie wymagają sprawdzania zakresu
+        clipped = not (radius <= x < width - radius and radius <= y < height - radius)
+        for xx, xy, yx, yy in OCTANTS:
+            self.cast(visible, x, y, origin, 1, 1.0, 0.0, xx, xy, yx, yy, clipped)
+        return visible
+
+    def cast(self, visible: set, cx, cy, origin, row, start, end, xx, xy, yx, yy, clipped) -> None:
+        """Jeden oktant: skanuj kolejne wiersze, rekurencyjnie dzieląc na przeszkodach"""
+        if start < end:
+            return
+        tiles, width, height = self.tiles.tiles, self.tiles.width, self.tiles.height
+        rows = octant_rows(self.radius)
+        # Krok indeksu przy zmianie dx i dy w układzie oktantu
+        stride_x = xx + yx * width
+        stride_y = xy + yy * width
+        new_start = 0.0
+        for distance in range(row, self.radius + 1):
+            dy = -distance
+            blocked = False
+            for dx, left_slope, right_slope, in_radius in rows[distance]:
+                if start < right_slope:
+                    continue
+                if end > left_slope:
+                    break
+                if clipped:
+                    map_x = cx + dx * xx + dy * xy
+                    map_y = cy + dx * yx + dy * yy
+                    if not (0 <= map_x < width and 0 <= map_y < height):
+                        wall = True
+                        index = None
+                    else:
+                        index = map_y * width + map_x
+                        wall = tiles[index] == Tile.WALL
+                else:
+                    index = origin + dx * stride_x + dy * stride_y
+                    wall = tiles[index] == Tile.WALL
+                if in_radius and index is not None:
+                    visible.add(index)
+                if blocked:
+                    if wall:
+                        new_start = right_slope
+                    else:
+                        blocked = False
+                        start = new_start
+                elif wall and distance < self.radius:
+                    blocked = True
+                    self.cast(visible, cx, cy, origin, distance + 1, start, left_slope, xx, xy, yx, yy, clipped)
+                    new_start = right_slope
+            if blocked:
+                break
+
+
+@cache
+def octant_rows(radius: int) -> list[list[tuple[int, float, float, bool]]]:
+    """Dla każdej odległości: (dx, lewe nachylenie, prawe nachylenie, czy w promieniu)"""
+    rows: list[list[tuple[int, float, float, bool]]] = [[]]
+    for distance in range(1, radius + 1):
+        dy = -distance
+        rows.append(
+            [
+                (dx, (dx - 0.5) / (dy + 0.5), (dx + 0.5) / (dy - 0.5), dx * dx + dy * dy <= radius * radius)
+                for dx in range(-distance, 1)
+            ]
+        )
+    return rows
@@ -0,0 +1,107 @@
+"""Ekwipunek gracza posortowany na bieżąco, z założonymi przedmiotami i sumami statystyk"""
+
+from bisect import bisect_left, bisect_right
+
+
+class Inventory:
+    """Items ordered by total stat value (best first), kept sorted on insert and remove.
+
+    Items with equal totals stay in pickup order, exactly like a stable sort of
+    the pickup list. Equipped items are flagged on the item itself, one per
+    category, and the attack/defense bonus of the equipment is kept as running
+    sums, updated only when equipment changes.
+
+    After fork() both inventories share their item objects; an item is copied
+    the first time either side changes it (copy-on-write).
+    """
+
+    def __init__(self):
+        self.items = []
+        self.keys = []  # -item.total, rosnąco - równoległa do items dla bisect
+        self.equipped = {}  # {'sword': item, 'shield': item, ...}
+        self.attack = 0
+        self.defense = 0
+        self.owned = None  # id() przedmiotów, które wolno zmieniać w miejscu; None - wszystkie
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __contains__(self, item) -> bool:
+        return self.index(item) is not None
+
+    def index(self, item) -> int | None:
+        """Pozycja przedmiotu na liście albo None"""
+        key = -item.total
+        start, end = bisect_left(self.keys, key), bisect_right(self.keys, key)
+        try:
+            return self.items.index(item, start, end)
+        except ValueError:
+            return None
+
+    def add(self, item) -> None:
+        position = bisect_right(self.keys, -item.total)
+        self.items.insert(position, item)
+        self.keys.insert(position, -item.total)
+
+    def remove(self, item) -> None:
+        """Usuń przedmiot (zdejmując go, jeśli był założony)"""
+        position = self.index(item)
+        if position is None:
+            raise ValueError(f"{item} is not in the inventory")
+        if item.equipped:
+            self.unequip(item)
+        del self.items[position]
+        del self.keys[position]
+
+    def fork(self) -> "Inventory":
+        """Kopia współdzieląca przedmioty z oryginałem (kopiowane dopiero przy zmianie)"""
+        clone = Inventory.__new__(Inventory)
+        clone.items = self.items.copy()
+        clone.keys = self.keys.copy()
+        clone.equipped = self.equipped.copy()
+        clone.attack = self.attack
+        clone.defense = self.defense
+        clone.owned = set()
+        self.owned = set()
+        return clone
+
+    def own(self, item):
+        """Przedmiot, który można zmienić bez wpływu na inne kopie ekwipunku"""
+        if self.owned is None or id(item) in self.owned:
+            return item
+        clone = item.copy()
+        position = self.index(item)
+        if position is not None:
+            self.items[position] = clone
+        if self.equipped.get(item.category) is item:
+            self.equipped[item.category] = clone
+        self.owned.add(id(clone))
+        return clone
+
+    def equip(self, item) -> None:
+        """Załóż przedmiot, zdejmując poprzedni z tej samej kategorii"""
+        item = self.own(item)
+        current = self.equipped.get(item.category)
+        if current is item:
+            return
+        if current is not None:
+            self.unequip(current)
+        self.equipped[item.category] = item
+        item.equipped = True
+        self.attack += item.attack
+        self.defense += item.defense
+
+    def unequip(self, item) -> None:
+        if self.equipped.get(item.category) is not item:
+            return
+        item = self.own(item)
+        del self.equipped[item.category]
+        item.equipped = False
+        self.attack -= item.attack
+        self.defense -= item.defense
@@ -0,0 +1,175 @@
+"""Magazyn odwiedzonych poziomów lochu: ostatnie jako obiekty, starsze skompresowane, najstarsze na dysku"""
+
+import os
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+from profiler import PhaseStats
+from savegame import pack_level, unpack_level
+
+RESIDENT_LEVELS = 3  # Poziomy trzymane jako gotowe obiekty (powrót bez rozpakowania)
+MEMORY_BUDGET = 64 << 20  # Bajty na poziomy w pamięci; nadmiar skompresowanych idzie na dysk
+SWAP_WINDOW = 256  # Liczba zapamiętanych czasów przełączeń poziomu
+TIERS = ("live", "packed", "disk")
+
+
+def live_bytes(state: dict) -> int:
+    """Przybliżony rozmiar poziomu trzymanego jako obiekty: bufory pól, indeks zajętości, potwory, skrzynie"""
+    buffers = (state["map"].tiles, state["fov"].explored, state["flow"].distances, state["occupancy"].cells)
+    size = sum(sys.getsizeof(buffer) for buffer in buffers)
+    return size + state["monsters"].nbytes() + sys.getsizeof(state["chests"])
+
+
+class LevelStore:
+    """Levels the player has left, in three tiers, the least recently used moved down first.
+
+    - live: the state dicts of GameCore.store_level, swapped back in without copying,
+    - packed: savegame.pack_level records - run-length encoded tiles and explored
+      mask plus packed chest and monster records,
+    - disk: packed records in files of a temporary directory.
+
+    At most resident levels stay live. When live and packed levels together
+    take more than budget bytes, packed levels go to disk (and, if that is
+    not enough, live levels get packed). take() times every swap per tier.
+    """
+
+    def __init__(self, resident: int = RESIDENT_LEVELS, budget: int = MEMORY_BUDGET, directory: str | None = None):
+        self.resident = resident
+        self.budget = budget
+        self.directory = directory  # None - katalog tymczasowy tworzony przy pierwszym zapisie na dysk
+        self.temporary: tempfile.TemporaryDirectory[str] | None = None
+        self.live: OrderedDict[int, tuple[dict, int]] = OrderedDict()  # poziom -> (stan, przybliżony rozmiar)
+        self.packed: OrderedDict[int, bytes] = OrderedDict()  # poziom -> rekord pack_level
+        self.disk: OrderedDict[int, tuple[str, int]] = OrderedDict()  # poziom -> (ścieżka, rozmiar pliku)
+        # Zakodowane kafelki poziomów trzymanych jako obiekty i bieżącego - mapa się nie zmienia,
+        # więc ponowne pakowanie koduje tylko odkryte pola i postacie
+        self.tile_runs: dict[int, bytes] = {}
+        self.swaps = {tier: PhaseStats(SWAP_WINDOW) for tier in TIERS}
+        self.evictions = PhaseStats(SWAP_WINDOW)  # Czas put(): pakowanie i zapis na dysk
+
+    def __contains__(self, level: int) -> bool:
+        return level in self.live or level in self.packed or level in self.disk
+
+    def __len__(self) -> int:
+        return len(self.live) + len(self.packed) + len(self.disk)
+
+    def put(self, level: int, state: dict) -> None:
+        """Odłóż poziom, który gracz opuszcza"""
+        start = time.perf_counter()
+        self.live[level] = (state, live_bytes(state))
+        self.evict()
+        self.evictions.add(time.perf_counter() - start)
+
+    def put_packed(self, level: int, record: bytes) -> None:
+        """Odłóż poziom od razu w postaci skompresowanej (np. wczytany z zapisu gry)"""
+        self.packed[level] = record
+        self.evict()
+
+    def take(self, level: int) -> dict | None:
+        """Stan poziomu wyjęty z magazynu albo None, jeśli gracz jeszcze tam nie był"""
+        start = time.perf_counter()
+        if level in self.live:
+            tier, state = "live", self.live.pop(level)[0]
+        elif level in self.packed:
+            tier, state = "packed", unpack_level(self.packed.pop(level))
+        elif level in self.disk:
+            tier, state = "disk", unpack_level(self.read(level))
+        else:
+            return None
+        if tier != "live":
+            self.tile_runs[level] = state.pop("tile_runs")
+        self.swaps[tier].add(time.perf_counter() - start)
+        return state
+
+    def evict(self) -> None:
+        while len(self.live) > self.resident:
+            self.pack_oldest()
+        while self.packed_bytes() + self.live_bytes() > self.budget and (self.packed or self.live):
+            if self.packed:
+                self.write_oldest()
+            else:
+                self.pack_oldest()
+
+    def pack_oldest(self) -> None:
+        level, (state, _) = self.live.popitem(last=False)
+        self.packed[level] = pack_level(state, self.tile_runs.pop(level, None))
+
+    def write_oldest(self) -> None:
+        level, record = self.packed.popitem(last=False)
+        path = os.path.join(self.level_directory(), f"level-{level}.bin")
+        with open(path, "wb") as file:
+            file.write(record)
+        self.disk[level] = (path, len(record))
+
+    def read(self, level: int) -> bytes:
+        path, _ = self.disk.pop(level)
+        with open(path, "rb") as file:
+            record = file.read()
+        os.remove(path)
+        return record
+
+    def level_directory(self) -> str:
+        if self.directory is None:
+            temporary = self.temporary = tempfile.TemporaryDirectory(prefix="roguelike-levels-")
+            self.directory = temporary.name
+        return self.directory
+
+    def records(self):
+        """Wszystkie poziomy jako pary (poziom, rekord pack_level), od najdawniej używanego; nic nie usuwa"""
+        for level, (path, _) in self.disk.items():
+            with open(path, "rb") as file:
+                yield level, file.read()
+        yield from self.packed.items()
+        for level, (state, _) in self.live.items():
+            yield level, pack_level(state, self.tile_runs.get(level))
+
+    def copy(self) -> "LevelStore":
+        """Niezależny magazyn z tymi samymi poziomami (dla GameCore.snapshot); kopia ma je skompresowane.
+
+        Live states are packed rather than shared, because the copy's game
+        will change the monsters and chests of a level once it goes back there.
+        """
+        store = LevelStore(self.resident, self.budget)
+        for level, record in self.records():
+            store.put_packed(level, record)
+        return store
+
+    def live_bytes(self) -> int:
+        # Kafelki bieżącego poziomu też są w tile_runs, ale ten poziom nie leży w magazynie
+        runs = self.tile_runs
+        return sum(size + len(runs.get(level, b"")) for level, (_, size) in self.live.items())
+
+    def packed_bytes(self) -> int:
+        return sum(len(record) for record in self.packed.values())
+
+    def disk_bytes(self) -> int:
+        return sum(size for _, size in self.disk.values())
+
+    def summary(self) -> dict:
+        """Liczba poziomów i bajty w każdej warstwie oraz czasy przełączeń (ms) według warstwy źródłowej"""
+        summary: dict[str, dict[str, float]] = {
+            "live": {"levels": len(self.live), "bytes": self.live_bytes()},
+            "packed": {"levels": len(self.packed), "bytes": self.packed_bytes()},
+            "disk": {"levels": len(self.disk), "bytes": self.disk_bytes()},
+        }
+        for tier, stats in (*self.swaps.items(), ("put", self.evictions)):
+            if stats.count:
+                summary.setdefault(tier, {}).update(
+                    swaps=stats.count,
+                    mean_ms=1000 * stats.total / stats.count,
+                    p99_ms=1000 * stats.percentile(0.99),
+                )
+        return summary
+
+    def report(self) -> str:
+        lines = [f"Stored levels (budget {self.budget / 2**20:.1f} MiB, {self.resident} live)"]
+        for tier, stats in self.summary().items():
+            line = f"{tier:<8}"
+            if "levels" in stats:
+                line += f"{stats['levels']:>4} levels {stats['bytes'] / 1024:>10.1f} KiB"
+            if "swaps" in stats:
+                line += f"   {stats['swaps']:>5} swaps, mean {stats['mean_ms']:.3f} ms, p99 {stats['p99_ms']:.3f} ms"
+            lines.append(line)
+        return "\n".join(lines)
@@ -0,0 +1,262 @@
+"""Klatki gry bez okna: na dowolną powierzchnię albo bufor RGB, z logu wejścia, równolegle w procesach"""
+
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from collections import deque
+from multiprocessing.pool import AsyncResult
+
+# Bez powitania pygame na stdout, który może nieść surowe klatki
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from assets import SpriteAtlas  # noqa: E402
+from engine import GameCore  # noqa: E402
+from levels import LevelStore  # noqa: E402
+from renderer import DirtyRectRenderer, Hud, RenderSystem, TextCache  # noqa: E402
+from replay import USE_ITEM, InputLog, apply  # noqa: E402
+from savegame import dumps, loads  # noqa: E402
+
+# Jak okno gry (main.py): 640x480, kafelki 32 px, dwa wiersze kafelków na pasek stanu
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+TILE_SIZE = 32
+HUD_ROWS = 2
+FRAMES_PER_TASK = 32  # Tury renderowane przez proces roboczy w jednym zadaniu
+VIDEO_FPS = 10
+
+
+class OffscreenRenderer:
+    """Game frames drawn without a window, onto a given Surface or a new one.
+
+    It is the game window's DirtyRectRenderer without pushing to the
+    display, so consecutive frames of one game redraw only the tiles that
+    changed; a new level or another game is detected by its map.
+    """
+
+    def __init__(
+        self,
+        surface: pygame.Surface | None = None,
+        width: int = FRAME_WIDTH,
+        height: int = FRAME_HEIGHT,
+        tile_size: int = TILE_SIZE,
+        images=None,
+    ):
+        pygame.font.init()
+        self.surface = surface or pygame.Surface((width, height))
+        self.width, self.height = self.surface.get_size()
+        view_height = self.height // tile_size - HUD_ROWS
+        hud = Hud(pygame.font.SysFont("Arial", 16, bold=True), TextCache(), view_height * tile_size)
+        images = images or SpriteAtlas(tile_size)
+        self.renderer = DirtyRectRenderer(
+            self.surface, images, tile_size, self.width // tile_size, view_height, hud.draw, present=False
+        )
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.width * self.height * 3
+
+    def render(self, game: GameCore) -> pygame.Surface:
+        """Narysuj klatkę gry; zwraca powierzchnię docelową"""
+        if game.map is not self.renderer.tiles:
+            self.renderer.set_level(game.map)
+        self.renderer.draw(game)
+        return self.surface
+
+    def rgb(self, game: GameCore, buffer=None):
+        """Klatka jako piksele RGB (wierszami, 3 bajty na piksel): nowe bytes albo zapisane w buffer.
+
+        buffer can be any writable, C-contiguous object with the buffer
+        protocol and frame_bytes bytes - a bytearray, or a uint8 numpy array
+        of shape (height, width, 3), filled in place without copying.
+        """
+        data = pygame.image.tobytes(self.render(game), "RGB")
+        if buffer is None:
+            return data
+        memoryview(buffer).cast("B")[:] = data
+        return buffer
+
+
+class RawWriter:
+    """Frames as raw rgb24 bytes to a binary stream, e.g. stdout piped into ffmpeg -f rawvideo"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, frame: bytes) -> None:
+        self.stream.write(frame)
+
+    def close(self) -> None:
+        self.stream.flush()
+
+
+class PipeWriter(RawWriter):
+    """Frames piped to the standard input of a command (see ffmpeg_command)"""
+
+    def __init__(self, command: list[str]):
+        self.command = command
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        super().__init__(self.process.stdin)
+
+    def close(self) -> None:
+        self.stream.close()
+        if self.process.wait():
+            raise RuntimeError(f"{self.command[0]} exited with code {self.process.returncode}")
+
+
+class ImageWriter:
+    """Every frame as an image file; pattern like frames/%06d.png, the extension picks the format"""
+
+    def __init__(self, pattern: str, width: int, height: int):
+        self.pattern = pattern
+        self.size = (width, height)
+        self.frames = 0
+
+    def write(self, frame: bytes) -> None:
+        pygame.image.save(pygame.image.frombuffer(frame, self.size, "RGB"), self.pattern % self.frames)
+        self.frames += 1
+
+    def close(self) -> None:
+        pass
+
+
+def ffmpeg_command(path: str, width: int, height: int, fps: int = VIDEO_FPS) -> list[str]:
+    """Polecenie ffmpeg kodujące surowe klatki rgb24 ze standardowego wejścia do pliku wideo"""
+    source = ["-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-"]
+    return ["ffmpeg", "-y", "-loglevel", "error", *source, "-pix_fmt", "yuv420p", path]
+
+
+def open_writer(output: str, width: int, height: int, fps: int = VIDEO_FPS):
+    """Wyjście "-" - surowe klatki na stdout, wzorzec z %d - pliki obrazów, inna ścieżka - wideo przez ffmpeg"""
+    if output == "-":
+        return RawWriter(sys.stdout.buffer)
+    if "%" in output:
+        return ImageWriter(output, width, height)
+    return PipeWriter(ffmpeg_command(output, width, height, fps))
+
+
+def frame_tasks(log: InputLog, frames_per_task: int = FRAMES_PER_TASK):
+    """Log pocięty na zadania (zapis stanu, rekordy logu, czy rysować stan początkowy) po frames_per_task tur.
+
+    The game is replayed here without drawing, which is much faster than
+    rendering; each task starts from a savegame of the state before its
+    records, so workers render their turns independently and the frames do
+    not depend on how the log is split.
+    """
+    game = GameCore(**log.game_options())
+    # Rysowanie klatki odkrywa pola w polu widzenia - bez tego stan zadania różniłby się od narysowanego
+    game.fov.update(game.player.x, game.player.y)
+    state, records, turns, first = dumps(game), [], 0, True
+    for code, index in log.events():
+        records.append((code, index))
+        apply(game, code, index)
+        if code < USE_ITEM:
+            game.fov.update(game.player.x, game.player.y)
+            turns += 1
+            if turns == frames_per_task:
+                yield state, records, first, log.persistent
+                state, records, turns, first = dumps(game), [], 0, False
+    if records or first:
+        yield state, records, first, log.persistent
+
+
+# Renderer procesu roboczego, tworzony przez start_worker
+worker_renderer: OffscreenRenderer | None = None
+
+
+def start_worker(width: int, height: int, tile_size: int) -> None:
+    global worker_renderer
+    worker_renderer = OffscreenRenderer(width=width, height=height, tile_size=tile_size)
+
+
+def render_task(task: tuple) -> list:
+    """Klatki zadania z frame_tasks: stan początkowy (w pierwszym zadaniu) i stan po każdej turze.
+
+    The per-turn frames are drawn by a RenderSystem added as the last
+    system of the game's turn; using or dropping items is not a turn.
+    """
+    state, records, first, persistent = task
+    renderer = worker_renderer
+    assert renderer is not None  # Ustawia go start_worker
+    game = loads(state, levels=LevelStore() if persistent else None)
+    frames = [renderer.rgb(game)] if first else []
+    game.scheduler.add(RenderSystem(lambda game: frames.append(renderer.rgb(game))))
+    for code, index in records:
+        apply(game, code, index)
+    return frames
+
+
+def render_log(
+    log: InputLog,
+    writer,
+    workers: int | None = None,
+    frames_per_task: int = FRAMES_PER_TASK,
+    width: int = FRAME_WIDTH,
+    height: int = FRAME_HEIGHT,
+    tile_size: int = TILE_SIZE,
+) -> dict:
+    """Wyrenderuj klatkę na każdą turę logu i przekaż je po kolei do writer; zwraca liczbę klatek i klatki/s.
+
+    With more than one worker (by default one per CPU), tasks are rendered
+    in a process pool and their frames come back through its pipes in
+    order. At most two tasks per worker are in flight, so a slow writer
+    does not pile up frames.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    tasks = frame_tasks(log, frames_per_task)
+    frames = 0
+    start = time.perf_counter()
+    if workers <= 1:
+        start_worker(width, height, tile_size)
+        for task in tasks:
+            for frame in render_task(task):
+                writer.write(frame)
+                frames += 1
+    else:
+        with multiprocessing.Pool(workers, start_worker, (width, height, tile_size)) as pool:
+            pending: deque[AsyncResult] = deque()
+            for task in tasks:
+                pending.append(pool.apply_async(render_task, (task,)))
+                while len(pending) > 2 * workers or (pending and pending[0].ready()):
+                    for frame in pending.popleft().get():
+                        writer.write(frame)
+                        frames += 1
+            while pending:
+                for frame in pending.popleft().get():
+                    writer.write(frame)
+                    frames += 1
+    writer.close()
+    elapsed = time.perf_counter() - start
+    return {"frames": frames, "seconds": elapsed, "fps": frames / elapsed, "workers": workers}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("log", help="Log wejścia z main.py --record albo benchmarks.py record")
+    parser.add_argument("output", help='Plik wideo (przez ffmpeg), wzorzec obrazów jak "klatki/%%06d.png" albo "-"')
+    parser.add_argument("--workers", type=int, default=None, help="Procesy renderujące (domyślnie jeden na CPU)")
+    parser.add_argument("--frames-per-task", type=int, default=FRAMES_PER_TASK)
+    parser.add_argument("--fps", type=int, default=VIDEO_FPS, help="Klatki na sekundę wideo")
+    parser.add_argument("--width", type=int, default=FRAME_WIDTH)
+    parser.add_argument("--height", type=int, default=FRAME_HEIGHT)
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE)
+    args = parser.parse_args()
+
+    log = InputLog.load(args.log)
+    writer = open_writer(args.output, args.width, args.height, args.fps)
+    result = render_log(log, writer, args.workers, args.frames_per_task, args.width, args.height, args.tile_size)
+    # Na stderr, bo stdout może nieść klatki
+    print(
+        f"{result['frames']} frames in {result['seconds']:.2f}s -> {result['fps']:.1f} frames/sec"
+        f" ({result['workers']} workers)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Mapa odległości (Dijkstra map) od gracza wspólna dla wszystkich potworów"""
+
+import copy
+import heapq
+from collections import deque
+
+from tilemap import Tile, TileMap
+
+UNREACHED = 255
+FLOW_RADIUS = 20  # Maksymalna liczona odległość (w krokach) od gracza
+
+# Kierunki ruchu (8-sąsiedztwo) w stałej kolejności
+DIRECTIONS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
+class FlowField:
+    """Distances in steps from the player to every cell within FLOW_RADIUS.
+
+    Relies on the map border being walls, so neighbour indices never wrap
+    across rows. A one-tile player move is applied incrementally: every
+    distance in the window grows by one (an upper bound of the new distance),
+    then a BFS from the new position relaxes only the cells that got closer.
+    """
+
+    def __init__(self, tiles: TileMap, radius: int = FLOW_RADIUS):
+        self.tiles = tiles
+        self.width = tiles.width
+        self.radius = radius
+        self.distances = bytearray([UNREACHED]) * len(tiles.tiles)
+        self.source: tuple[int, int] | None = None  # Pozycja gracza, od której liczone są odległości
+        self.offsets = [dy * self.width + dx for dx, dy in DIRECTIONS]
+        # Tablica dla bytes.translate: odległość + 1, powyżej promienia "nieosiągalne"
+        self.grow = bytes(value + 1 if value + 1 <= radius else UNREACHED for value in range(256))
+
+    def update(self, x: int, y: int) -> None:
+        """Przelicz mapę dla nowej pozycji gracza"""
+        if self.source == (x, y):
+            return
+        if self.source is not None and max(abs(x - self.source[0]), abs(y - self.source[1])) == 1:
+            self.shift(x, y)
+        else:
+            self.rebuild(x, y)
+
+    def copy(self) -> "FlowField":
+        """Kopia z własną tablicą odległości (mapa i tablice pomocnicze są współdzielone)"""
+        field = copy.copy(self)
+        field.distances = self.distances.copy()
+        return field
+
+    def window(self, x: int, y: int):
+        """Wycinki wierszy (start, end) obejmujące promień wokół (x, y)"""
+        reach = self.radius + 1
+        left, right = max(x - reach, 0), min(x + reach + 1, self.width)
+        for row in range(max(y - reach, 0), min(y + reach + 1, self.tiles.height)):
+            yield row * self.width + left, row * self.width + right
+
+    def rebuild(self, x: int, y: int) -> None:
+        if self.source is not None:
+            for start, end in self.window(*self.source):
+                self.distances[start:end] = bytes([UNREACHED]) * (end - start)
+        self.source = (x, y)
+        self.relax(y * self.width + x)
+
+    def shift(self, x: int, y: int) -> None:
+        assert self.source is not None
+        for start, end in self.window(*self.source):
+            self.distances[start:end] = self.distances[start:end].translate(self.grow)
+        self.source = (x, y)
+        self.relax(y * self.width + x)
+
+    def relax(self, source: int) -> None:
+        """BFS od źródła, poprawiający tylko pola, do których droga się skróciła"""
+        distances, tiles, offsets, radius = self.distances, self.tiles.tiles, self.offsets, self.radius
+        distances[source] = 0
+        queue = deque([source])
+        while queue:
+            index = queue.popleft()
+            step = distances[index] + 1
+            if step > radius:
+                continue
+            for offset in offsets:
+                neighbour = index + offset
+                if step < distances[neighbour] and tiles[neighbour] != Tile.WALL:
+                    distances[neighbour] = step
+                    queue.append(neighbour)
+
+    def distance(self, x: int, y: int) -> int:
+        return self.distances[y * self.width + x]
+
+    def next_step(self, x: int, y: int) -> tuple[int, int] | None:
+        """Kierunek (dx, dy) w stronę gracza albo None, gdy nie ma krótszej drogi.
+
+        Among equally good steps the straight-line direction to the player wins,
+        so on an open map monsters move exactly like the old greedy chase.
+        """
+        index = y * self.width + x
+        distances = self.distances
+        best = distances[index]
+        best_direction = None
+        for direction, offset in zip(DIRECTIONS, self.offsets):
+            if distances[index + offset] < best:
+                best = distances[index + offset]
+                best_direction = direction
+        if best_direction is None:
+            return None
+        assert self.source is not None
+        source_x, source_y = self.source
+        greedy = ((source_x > x) - (source_x < x), (source_y > y) - (source_y < y))
+        if distances[index + greedy[1] * self.width + greedy[0]] == best:
+            return greedy
+        return best_direction
+
+
+def astar_next_step(tiles: TileMap, start: tuple, goal: tuple) -> tuple | None:
+    """Pierwszy krok najkrótszej ścieżki A* (8-sąsiedztwo) - punkt odniesienia dla FlowField"""
+    width = tiles.width
+    goal_x, goal_y = goal
+    start_index = start[1] * width + start[0]
+    goal_index = goal_y * width + goal_x
+    came_from = {start_index: None}
+    cost = {start_index: 0}
+    queue = [(0, start_index)]
+    while queue:
+        _, index = heapq.heappop(queue)
+        if index == goal_index:
+            break
+        for dx, dy in DIRECTIONS:
+            neighbour = index + dy * width + dx
+            if tiles.tiles[neighbour] == Tile.WALL:
+                continue
+            new_cost = cost[index] + 1
+            if new_cost < cost.get(neighbour, float("inf")):
+                cost[neighbour] = new_cost
+                came_from[neighbour] = index
+                x, y = neighbour % width, neighbour // width
+                heapq.heappush(queue, (new_cost + max(abs(goal_x - x), abs(goal_y - y)), neighbour))
+    if goal_index not in came_from or goal_index == start_index:
+        return None
+    index = goal_index
+    while came_from[index] != start_index:
+        index = came_from[index]
+    return index % width - start[0], index // width - start[1]
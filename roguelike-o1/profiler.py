@@ -0,0 +1,133 @@
+"""Pomiar czasu faz tury (rysowanie, wejście, ruch, AI, generowanie poziomu) z kroczącymi percentylami"""
+
+import json
+import time
+from collections import deque
+
+# Metody GameCore mierzone jako osobne fazy (zagnieżdżone: step zawiera move_player i update,
+# change_level - przejście schodami, razem z wymianą poziomów w magazynie - zawiera generate_level).
+# Systemy z update (loot, stairs, ai, movement, combat) mierzy harmonogram gry, gdy ma profiler (scheduler.profiler)
+GAME_PHASES = ("step", "move_player", "attack", "update", "change_level", "generate_level")
+# Fazy warstwy pygame; "wait" to czekanie pętli zdarzeń na klawisz wewnątrz handle_input
+FRONTEND_PHASES = ("draw", "handle_input")
+
+
+class PhaseStats:
+    """Rolling window of durations of one phase"""
+
+    def __init__(self, window: int):
+        self.times: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.times.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Percentyl okna w sekundach (metoda najbliższej pozycji)"""
+        if not self.times:
+            return 0.0
+        ordered = sorted(self.times)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def profiled_class(obj) -> type:
+    """Podklasa tylko dla obj, na której wiszą mierzone metody; tworzona przy pierwszym wrap"""
+    cls = type(obj)
+    if not cls.__dict__.get("profiled", False):
+        # Puste __slots__ - ten sam układ obiektu, więc można podmienić mu klasę
+        cls = type(cls.__name__, (cls,), {"__slots__": (), "__module__": cls.__module__, "profiled": True})
+        obj.__class__ = cls
+    return cls
+
+
+class Profiler:
+    """Times instrumented methods per phase, keeps p50/p99 over the last window calls.
+
+    Methods are wrapped in a subclass made for the one instance, so its
+    class and other instances are not affected, while copies of the
+    instance made from its type (GameCore.snapshot) run and time their own
+    calls. With trace=True every call is also kept as a trace event
+    (see save_trace), meant for headless runs of bounded length.
+    """
+
+    def __init__(self, window: int = 512, trace: bool = False):
+        self.window = window
+        self.phases: dict[str, PhaseStats] = {}
+        self.events: list[tuple[str, float, float]] | None = [] if trace else None
+        self.started = time.perf_counter()
+
+    def record(self, name: str, start: float, seconds: float) -> None:
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats(self.window)
+        stats.add(seconds)
+        if self.events is not None:
+            self.events.append((name, start, seconds))
+
+    def wrap(self, obj, method: str, name: str | None = None) -> None:
+        """Podmień obj.method na wersję mierzącą czas wywołań jako fazę name"""
+        cls = profiled_class(obj)
+        original = getattr(cls, method)
+        name = name or method
+        record, clock = self.record, time.perf_counter
+
+        def timed(instance, *args, **kwargs):
+            start = clock()
+            try:
+                return original(instance, *args, **kwargs)
+            finally:
+                record(name, start, clock() - start)
+
+        setattr(cls, method, timed)
+
+    def instrument(self, obj, methods):
+        """Mierz wszystkie podane metody obiektu; zwraca obj"""
+        for method in methods:
+            self.wrap(obj, method)
+        return obj
+
+    def summary(self) -> dict:
+        """Dla każdej fazy: liczba wywołań, średnia z całego przebiegu oraz p50/p99/max okna w ms"""
+        return {
+            name: {
+                "count": stats.count,
+                "mean_ms": 1000 * stats.total / stats.count,
+                "p50_ms": 1000 * stats.percentile(0.5),
+                "p99_ms": 1000 * stats.percentile(0.99),
+                "max_ms": 1000 * max(stats.times),
+            }
+            for name, stats in self.phases.items()
+        }
+
+    def table(self) -> list:
+        """Wiersz nagłówka i po jednym wierszu na fazę, komórki jako tekst"""
+        rows = [("phase", "calls", "mean", "p50", "p99", "max")]
+        for name, stats in self.summary().items():
+            times = (stats["mean_ms"], stats["p50_ms"], stats["p99_ms"], stats["max_ms"])
+            rows.append((name, str(stats["count"]), *(f"{value:.3f}" for value in times)))
+        return rows
+
+    def lines(self) -> list:
+        return [f"{row[0]:<15}" + "".join(f"{cell:>9}" for cell in row[1:]) for row in self.table()]
+
+    def report(self) -> str:
+        return "\n".join(["Phase times in ms (p50/p99/max over the last calls)", *self.lines()])
+
+    def save_trace(self, path: str) -> None:
+        """Zapisz zdarzenia w formacie Trace Event (chrome://tracing, Perfetto)"""
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": 1e6 * (start - self.started),
+                "dur": 1e6 * seconds,
+                "pid": 0,
+                "tid": 0,
+            }
+            for name, start, seconds in self.events or ()
+        ]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
@@ -0,0 +1,362 @@
+"""Renderer z buforowaną warstwą mapy, mgłą wojny i odświeżaniem tylko zmienionych kafelków"""
+
+import time
+from collections import OrderedDict, deque
+
+import pygame
+
+from ecs import System
+from tilemap import Tile, TileMap
+
+COLOR_BLACK = (0, 0, 0)
+COLOR_WHITE = (255, 255, 255)
+COLOR_BLUE = (0, 0, 255)
+COLOR_PURPLE = (128, 0, 128)
+COLOR_RED = (255, 0, 0)
+COLOR_GREEN = (0, 255, 0)
+HEALTH_BAR_HEIGHT = 5
+HEALTH_BAR_OFFSET = 2
+FOG_ALPHA = 160  # Przyciemnienie pól odkrytych, ale obecnie niewidocznych
+
+# Znaczniki stanu kafelka rysowane jak zwykłe elementy
+HIDDEN = ("hidden",)
+FOG = ("fog",)
+
+
+class FrameStats:
+    """Rolling frame-time statistics"""
+
+    def __init__(self, window: int = 600):
+        self.times: deque[float] = deque(maxlen=window)
+        self.rects: deque[int] = deque(maxlen=window)
+        self.frames = 0
+
+    def add(self, seconds: float, rects: int) -> None:
+        self.times.append(seconds)
+        self.rects.append(rects)
+        self.frames += 1
+
+    def summary(self) -> dict:
+        """Średni i maksymalny czas klatki w ms oraz średnia liczba odświeżonych prostokątów"""
+        if not self.times:
+            return {"frames": 0, "mean_ms": 0.0, "max_ms": 0.0, "mean_rects": 0.0}
+        return {
+            "frames": self.frames,
+            "mean_ms": 1000 * sum(self.times) / len(self.times),
+            "max_ms": 1000 * max(self.times),
+            "mean_rects": sum(self.rects) / len(self.rects),
+        }
+
+
+class TextCache:
+    """Rendered text surfaces keyed by (font, text, color) with LRU eviction"""
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.surfaces: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text: str, color: tuple) -> pygame.Surface:
+        """Powierzchnia z tekstem (antyaliasing), renderowana tylko przy pierwszym użyciu"""
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def summary(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.surfaces),
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class Hud:
+    """Health bar and player stats in the strip below the map view, drawn on any surface"""
+
+    def __init__(self, font, text_cache: TextCache, top: int):
+        self.font = font
+        self.text_cache = text_cache
+        self.top = top  # Pierwszy wiersz pikseli pod widokiem mapy
+
+    def draw(self, surface, game) -> None:
+        # Wyświetl pasek życia
+        self.draw_health_bar(surface, game.player)
+
+        # Wyświetl informacje
+        self.draw_stats(surface, game)
+
+    def draw_health_bar(self, surface, player) -> None:
+        bar_width = 200
+        bar_height = 20
+        x = 10
+        y = self.top + 5
+
+        # Tło paska
+        pygame.draw.rect(surface, COLOR_RED, (x, y, bar_width, bar_height))
+        # Wypełnienie paska
+        hp_ratio = player.hp / player.max_hp
+        pygame.draw.rect(surface, COLOR_GREEN, (x, y, bar_width * hp_ratio, bar_height))
+        # Obramowanie
+        pygame.draw.rect(surface, COLOR_WHITE, (x, y, bar_width, bar_height), 2)
+
+    def draw_stats(self, surface, game) -> None:
+        player, render = game.player, self.text_cache.render
+        y_offset = self.top + 30
+        # Atak
+        surface.blit(render(self.font, f"Atk: {player.total_attack()}", COLOR_BLUE), (10, y_offset))
+        # Obrona
+        surface.blit(render(self.font, f"Def: {player.total_defense()}", COLOR_PURPLE), (100, y_offset))
+        # Poziom gracza
+        surface.blit(render(self.font, f"Lvl: {player.level}", COLOR_WHITE), (200, y_offset))
+        # Doświadczenie
+        surface.blit(render(self.font, f"Exp: {player.exp}", COLOR_WHITE), (350, y_offset))
+        # Poziom lochu
+        surface.blit(render(self.font, f"Stage: {game.level}", COLOR_WHITE), (500, y_offset))
+
+
+class Camera:
+    """Okno widoku (w kafelkach) podążające za graczem, przycięte do granic mapy"""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.x = 0
+        self.y = 0
+
+    def follow(self, x: int, y: int, map_width: int, map_height: int) -> bool:
+        """Wyśrodkuj widok na (x, y); zwraca True, jeśli widok się przesunął"""
+        new_x = min(max(x - self.width // 2, 0), max(map_width - self.width, 0))
+        new_y = min(max(y - self.height // 2, 0), max(map_height - self.height, 0))
+        moved = (new_x, new_y) != (self.x, self.y)
+        self.x, self.y = new_x, new_y
+        return moved
+
+
+class DirtyRectRenderer:
+    """Rysuje grę na powierzchni, odświeżając tylko kafelki, których zawartość się zmieniła.
+
+    Only the camera window is visited: the cached background holds just the
+    visible tiles and entities are looked up through the occupancy grid, so
+    the cost of a frame does not depend on the size of the map.
+
+    The surface can be the display or any off-screen Surface; with
+    present=False frames are only drawn, never pushed to the display.
+    hud_painter(surface, game) draws the strip below the map view.
+    """
+
+    def __init__(
+        self,
+        surface,
+        images: dict,
+        tile_size: int,
+        view_width: int,
+        view_height: int,
+        hud_painter,
+        present: bool = True,
+    ):
+        self.surface = surface
+        self.present = present
+        self.images = images
+        self.tile_size = tile_size
+        self.camera = Camera(view_width, view_height)
+        self.hud_painter = hud_painter
+        self.hud_rect = pygame.Rect(
+            0, view_height * tile_size, surface.get_width(), surface.get_height() - view_height * tile_size
+        )
+        self.background = pygame.Surface((view_width * tile_size, view_height * tile_size))
+        if pygame.display.get_surface() is not None:
+            self.background = self.background.convert()
+        self.fog = pygame.Surface((tile_size, tile_size), pygame.SRCALPHA)
+        self.fog.fill((0, 0, 0, FOG_ALPHA))
+        self.tiles: TileMap | None = None
+        self.stats = FrameStats()
+        self.overlay = None  # Opcjonalna funkcja rysująca nakładkę na klatce, zwraca zajęty prostokąt
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Wymuś pełne przerysowanie przy następnej klatce (np. po ekranie ekwipunku)"""
+        self.cells: dict[tuple[int, int], tuple] = {}
+        self.hud_state: tuple | None = None
+        self.full_redraw = True
+
+    def set_level(self, tiles: TileMap) -> None:
+        """Nowy poziom: tło zostanie złożone przy najbliższej klatce"""
+        self.tiles = tiles
+        self.background_stale = True
+        self.invalidate()
+
+    def compose_background(self) -> None:
+        """Pre-compose static floor and wall tiles of the camera window into the cached background"""
+        floor_image = self.images["floor"]
+        wall_image = self.images["wall"]
+        camera, tiles = self.camera, self.tiles
+        assert tiles is not None
+        self.background.fill(COLOR_BLACK)
+        right = min(camera.x + camera.width, tiles.width)
+        for y in range(camera.y, min(camera.y + camera.height, tiles.height)):
+            row = tiles.tiles[y * tiles.width + camera.x : y * tiles.width + right]
+            for x, tile in enumerate(row):
+                pos = (x * self.tile_size, (y - camera.y) * self.tile_size)
+                if tile == Tile.FLOOR:
+                    self.background.blit(floor_image, pos)
+                elif tile == Tile.WALL:
+                    self.background.blit(wall_image, pos)
+        self.background_stale = False
+
+    def collect_cells(self, game) -> dict[tuple[int, int], tuple]:
+        """Lista elementów rysowanych na każdym widocznym kafelku, w kolejności rysowania.
+
+        Cells the player has never seen are drawn black, explored cells outside
+        the field of view are fogged and show only chests and stairs. Plain
+        visible cells get no entry, the cached background covers them.
+        """
+        camera, fov, tiles = self.camera, game.fov, self.tiles
+        assert tiles is not None
+        explored, visible, width = fov.explored, fov.visible, tiles.width
+        cells: dict[tuple[int, int], list[tuple]] = {}
+        fogged = []
+        for y in range(camera.y, min(camera.y + camera.height, tiles.height)):
+            for x in range(camera.x, min(camera.x + camera.width, width)):
+                index = y * width + x
+                if not explored[index]:
+                    cells[(x, y)] = [HIDDEN]
+                    continue
+                if index not in visible:
+                    fogged.append((x, y))
+                if (x, y) in game.chests:
+                    cells[(x, y)] = [("sprite", "chest", x, y)]
+        for sprite in ("stairs_down", "stairs_up"):
+            stairs = getattr(game, sprite)
+            if stairs is not None and self.in_view(stairs) and explored[stairs[1] * width + stairs[0]]:
+                cells.setdefault(stairs, []).append(("sprite", sprite, *stairs))
+        # Wiersz pod widokiem też, bo paski życia wystają na kafelek powyżej
+        for entity in game.occupancy.window(camera.x, camera.y, camera.width, camera.height + 1):
+            if entity is game.player or entity.y * width + entity.x not in visible:
+                continue
+            x, y = entity.x, entity.y
+            bar = ("bar", x, y, int(self.tile_size * entity.hp / entity.max_hp))
+            cells.setdefault((x, y), []).extend((("sprite", entity.sprite, x, y), bar))
+            cells.setdefault((x, y - 1), []).append(bar)
+        player = game.player
+        cells.setdefault((player.x, player.y), []).append(("sprite", player.sprite, player.x, player.y))
+        for cell in fogged:
+            cells.setdefault(cell, []).append(FOG)
+        return {cell: tuple(items) for cell, items in cells.items() if self.in_view(cell)}
+
+    def hud_key(self, game) -> tuple:
+        player = game.player
+        return (
+            player.hp,
+            player.max_hp,
+            player.total_attack(),
+            player.total_defense(),
+            player.level,
+            player.exp,
+            game.level,
+        )
+
+    def screen_pos(self, x: int, y: int) -> tuple:
+        return (x - self.camera.x) * self.tile_size, (y - self.camera.y) * self.tile_size
+
+    def draw_item(self, item, rect: pygame.Rect) -> None:
+        if item[0] == "sprite":
+            _, sprite, x, y = item
+            self.surface.blit(self.images[sprite], self.screen_pos(x, y))
+        elif item is HIDDEN:
+            self.surface.fill(COLOR_BLACK, rect)
+        elif item is FOG:
+            self.surface.blit(self.fog, rect)
+        else:
+            _, x, y, width = item
+            bar_x, bar_y = self.screen_pos(x, y)
+            bar_y -= HEALTH_BAR_HEIGHT + HEALTH_BAR_OFFSET
+            # Tło paska (czerwone) i aktualne HP (zielone)
+            pygame.draw.rect(self.surface, (255, 0, 0), (bar_x, bar_y, self.tile_size, HEALTH_BAR_HEIGHT))
+            pygame.draw.rect(self.surface, (0, 255, 0), (bar_x, bar_y, width, HEALTH_BAR_HEIGHT))
+
+    def draw_cell(self, cell, items) -> pygame.Rect:
+        rect = pygame.Rect(self.screen_pos(*cell), (self.tile_size, self.tile_size))
+        self.surface.set_clip(rect)
+        self.surface.blit(self.background, rect, rect)
+        for item in items:
+            self.draw_item(item, rect)
+        self.surface.set_clip(None)
+        return rect
+
+    def draw(self, game) -> None:
+        """Narysuj klatkę i wypchnij na ekran tylko zmienione obszary"""
+        start = time.perf_counter()
+        player, tiles = game.player, self.tiles
+        assert tiles is not None
+        game.fov.update(player.x, player.y)
+        if self.camera.follow(player.x, player.y, tiles.width, tiles.height) or self.background_stale:
+            self.compose_background()
+            self.full_redraw = True
+        cells = self.collect_cells(game)
+        hud_state = self.hud_key(game)
+        rects = []
+
+        if self.full_redraw:
+            self.surface.blit(self.background, (0, 0))
+            for cell, items in cells.items():
+                self.draw_cell(cell, items)
+        else:
+            for cell in self.cells.keys() | cells.keys():
+                items = cells.get(cell, ())
+                if self.cells.get(cell, ()) != items:
+                    rects.append(self.draw_cell(cell, items))
+
+        if self.full_redraw or hud_state != self.hud_state:
+            self.surface.fill(COLOR_BLACK, self.hud_rect)
+            self.hud_painter(self.surface, game)
+            rects.append(self.hud_rect)
+
+        if self.overlay is not None:
+            # Nakładka zmienia się co klatkę, więc jest rysowana zawsze, nad kafelkami
+            rects.append(self.overlay(self.surface))
+
+        if self.full_redraw:
+            rects = [self.surface.get_rect()]
+            if self.present:
+                pygame.display.flip()
+        elif rects and self.present:
+            pygame.display.update(rects)
+
+        self.cells = cells
+        self.hud_state = hud_state
+        self.full_redraw = False
+        self.stats.add(time.perf_counter() - start, len(rects))
+
+    def in_view(self, cell) -> bool:
+        x, y = cell
+        camera = self.camera
+        return camera.x <= x < camera.x + camera.width and camera.y <= y < camera.y + camera.height
+
+
+class RenderSystem(System):
+    """Draws a frame at the end of every turn through draw(game) - e.g. offscreen.OffscreenRenderer.render.
+
+    Drawing updates the field of view (explored cells), hence the fov write.
+    """
+
+    name = "render"
+    reads = ("level", "position", "health", "player", "chests", "occupancy")
+    writes = ("fov", "frame")
+
+    def __init__(self, draw):
+        self.draw = draw
+
+    def run(self, game) -> None:
+        self.draw(game)
@@ -0,0 +1,138 @@
+"""Zapis akcji gracza w zwartym logu binarnym i odtwarzanie rozgrywki bez okna"""
+
+import struct
+
+from engine import Action, GameCore
+from levels import LevelStore
+
+MAGIC = b"RGLG"
+VERSION = 2  # 2: flaga trwałego lochu
+# Nagłówek: magic, wersja, ziarno, szerokość, wysokość, maks. potworów, długość nazwy generatora, trwały loch
+PREAMBLE = struct.Struct("<4sB")
+HEADER = struct.Struct("<4sBQHHHBB")
+HEADER_V1 = struct.Struct("<4sBQHHHB")
+INDEX = struct.Struct("<I")
+# Kody rekordów: 0..15 to Action (1 bajt), poniższe mają dodatkowo indeks przedmiotu
+USE_ITEM = 0x10
+DROP_ITEM = 0x11
+
+
+class InputLog:
+    """Game options plus every player input: one byte per turn, five per inventory action.
+
+    Items are referred to by their position in the (deterministically ordered)
+    inventory, so the log together with the seed reproduces the session exactly.
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        width: int,
+        height: int,
+        max_monsters: int,
+        generator: str,
+        records=b"",
+        persistent: bool = False,
+    ):
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.max_monsters = max_monsters
+        self.generator = generator
+        self.records = bytearray(records)
+        self.persistent = persistent  # Gra z magazynem poziomów - ze schodami w górę
+
+    @classmethod
+    def for_game(cls, game: GameCore) -> "InputLog":
+        persistent = game.levels is not None
+        return cls(game.seed, game.width, game.height, game.max_monsters, game.generator_name, persistent=persistent)
+
+    def step(self, action: Action) -> None:
+        self.records.append(action)
+
+    def use_item(self, index: int) -> None:
+        self.records.append(USE_ITEM)
+        self.records += INDEX.pack(index)
+
+    def drop_item(self, index: int) -> None:
+        self.records.append(DROP_ITEM)
+        self.records += INDEX.pack(index)
+
+    def game_options(self) -> dict:
+        """Argumenty GameCore odtwarzające zapisaną grę"""
+        options = {
+            "width": self.width,
+            "height": self.height,
+            "max_monsters": self.max_monsters,
+            "generator": self.generator,
+            "seed": self.seed,
+        }
+        if self.persistent:
+            options["levels"] = LevelStore()
+        return options
+
+    def events(self):
+        """Rekordy logu jako pary (kod, indeks przedmiotu albo None)"""
+        records = self.records
+        position = 0
+        while position < len(records):
+            code = records[position]
+            position += 1
+            if code in (USE_ITEM, DROP_ITEM):
+                (index,) = INDEX.unpack_from(records, position)
+                position += INDEX.size
+                yield code, index
+            else:
+                yield code, None
+
+    def to_bytes(self) -> bytes:
+        name = self.generator.encode()
+        header = HEADER.pack(
+            MAGIC, VERSION, self.seed, self.width, self.height, self.max_monsters, len(name), self.persistent
+        )
+        return header + name + self.records
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "InputLog":
+        if len(data) < PREAMBLE.size:
+            raise ValueError("Not an input log")
+        magic, version = PREAMBLE.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not an input log")
+        header = {VERSION: HEADER, 1: HEADER_V1}.get(version)
+        if header is None:
+            raise ValueError(f"Unsupported input log version: {version}")
+        if len(data) < header.size:
+            raise ValueError("Truncated input log header")
+        _, _, seed, width, height, max_monsters, name_length, *rest = header.unpack_from(data)
+        header_size, persistent = header.size, rest[0] if rest else False
+        start = header_size + name_length
+        generator = data[header_size:start].decode()
+        return cls(seed, width, height, max_monsters, generator, data[start:], bool(persistent))
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "InputLog":
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+
+def replay(log: InputLog, game_class=GameCore) -> GameCore:
+    """Odtwórz zapisaną rozgrywkę tak szybko, jak się da, i zwróć grę w stanie końcowym"""
+    game = game_class(**log.game_options())
+    for code, index in log.events():
+        apply(game, code, index)
+    return game
+
+
+def apply(game: GameCore, code: int, index: int | None) -> None:
+    """Wykonaj w grze jeden rekord logu (z InputLog.events)"""
+    if code == USE_ITEM:
+        game.use_item(game.player.inventory[index])
+    elif code == DROP_ITEM:
+        game.drop_item(game.player.inventory[index])
+    else:
+        game.step(Action(code))
@@ -0,0 +1,42 @@
+"""Niezależne, deterministyczne strumienie liczb losowych dla podsystemów gry"""
+
+import random
+
+
+class RandomStreams:
+    """One random.Random per subsystem, all derived from the game seed.
+
+    Streams do not affect each other, e.g. an extra AI draw never shifts the
+    next loot roll. Level streams depend only on the seed and the level number,
+    so what a level contains does not depend on how the player got there.
+    """
+
+    def __init__(self, seed: int):
+        self.seed = seed
+        self.player = self.stream("player")  # Statystyki początkowe gracza
+        self.loot = self.stream("loot")  # Przedmioty wypadające z potworów
+        self.combat = self.stream("combat")  # Trafienia krytyczne i szansa na łup
+        self.ai = self.stream("ai")  # Ruchy potworów
+
+    def copy(self) -> "RandomStreams":
+        """Kopia z bieżącym stanem wszystkich strumieni"""
+        streams = RandomStreams.__new__(RandomStreams)
+        streams.seed = self.seed
+        streams.player = copy_stream(self.player)
+        streams.loot = copy_stream(self.loot)
+        streams.combat = copy_stream(self.combat)
+        streams.ai = copy_stream(self.ai)
+        return streams
+
+    def stream(self, name: str) -> random.Random:
+        return random.Random(f"{self.seed}/{name}")
+
+    def level(self, level: int) -> random.Random:
+        """Strumień rozmieszczenia obiektów na poziomie (potwory, skrzynie, gracz, schody)"""
+        return random.Random(f"{self.seed}/level/{level}")
+
+
+def copy_stream(stream: random.Random) -> random.Random:
+    clone = random.Random.__new__(random.Random)
+    clone.setstate(stream.getstate())
+    return clone
@@ -0,0 +1,320 @@
+"""Zapis i odczyt pełnego stanu gry w zwartym, wersjonowanym formacie binarnym"""
+
+import mmap
+import random
+import struct
+from array import array
+from itertools import compress
+
+from engine import GameCore, Item, Monsters, Player
+from fov import FieldOfView
+from inventory import Inventory
+from pathfinding import FlowField
+from spatial import OccupancyGrid
+from tilemap import TileMap
+
+MAGIC = b"RGSV"
+VERSION = 2  # 2: schody w górę i poziomy z magazynu (trwały loch)
+# Mapy od tego rozmiaru są zapisywane od granicy strony i wczytywane przez mmap
+MMAP_MIN_CELLS = 1 << 16
+
+PREAMBLE = struct.Struct("<4sBQ")  # magic, wersja, przesunięcie kafelków mapy w pliku
+GAME = struct.Struct("<QIIIHQBB")  # seed, szerokość, wysokość, maks. potworów, poziom, kroki, śmierć, wygrana
+PLAYER = struct.Struct("<iiiiiiqI")  # x, y, hp, max_hp, atak, obrona, doświadczenie, poziom
+ITEM = struct.Struct("<iiiB")  # atak, obrona, leczenie, założony
+POINT = struct.Struct("<ii")
+NO_POINT = (-1, -1)  # Brak schodów w górę
+COUNT = struct.Struct("<I")
+LEVEL = struct.Struct("<II")  # Rekord poziomu z magazynu: szerokość, wysokość
+RNG_HEADER = struct.Struct("<BBd")  # wersja stanu, czy jest gauss_next, gauss_next
+# Kolumny potworów (engine.Monsters, bez intencji ruchu) zapisywane jako tablice int32
+MONSTER_COLUMNS = ("x", "y", "kind", "hp", "max_hp", "uid")
+# Tablica dla bytes.translate: 1 dla każdego niezerowego bajtu
+NONZERO = bytes([0] + [1] * 255)
+SINGLE_BYTES = [bytes((value,)) for value in range(256)]
+
+
+class Reader:
+    """Kolejne pola z bufora bajtów"""
+
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def unpack(self, layout: struct.Struct) -> tuple:
+        values = layout.unpack_from(self.data, self.position)
+        self.position += layout.size
+        return values
+
+    def count(self) -> int:
+        return self.unpack(COUNT)[0]
+
+    def bytes(self, size: int) -> bytes:
+        chunk = bytes(self.data[self.position : self.position + size])
+        self.position += size
+        return chunk
+
+    def string(self) -> str:
+        return self.bytes(self.count()).decode()
+
+    def array(self, typecode: str, count: int) -> array:
+        values = array(typecode)
+        values.frombytes(self.bytes(count * values.itemsize))
+        return values
+
+
+def pack_string(text: str) -> bytes:
+    data = text.encode()
+    return COUNT.pack(len(data)) + data
+
+
+def pack_item(item: Item) -> bytes:
+    return (
+        pack_string(item.name)
+        + pack_string(item.category)
+        + ITEM.pack(item.attack, item.defense, item.healing, item.equipped)
+    )
+
+
+def read_item(reader: Reader) -> Item:
+    name, category = reader.string(), reader.string()
+    attack, defense, healing, equipped = reader.unpack(ITEM)
+    item = Item(name, category, attack, defense, healing)
+    item.equipped = bool(equipped)
+    return item
+
+
+def pack_rng(stream: random.Random) -> bytes:
+    version, internal, gauss_next = stream.getstate()
+    header = RNG_HEADER.pack(version, gauss_next is not None, gauss_next or 0.0)
+    return header + array("I", internal).tobytes()
+
+
+def read_rng(reader: Reader) -> random.Random:
+    version, has_gauss, gauss_next = reader.unpack(RNG_HEADER)
+    internal = reader.array("I", 625)
+    stream = random.Random.__new__(random.Random)
+    stream.setstate((version, tuple(internal), gauss_next if has_gauss else None))
+    return stream
+
+
+def pack_point(point: tuple | None) -> bytes:
+    return POINT.pack(*(point or NO_POINT))
+
+
+def read_point(reader: Reader) -> tuple | None:
+    point = reader.unpack(POINT)
+    return None if point == NO_POINT else point
+
+
+def pack_chests(chests: dict) -> bytes:
+    parts = [COUNT.pack(len(chests))]
+    for (x, y), item in chests.items():
+        parts.append(POINT.pack(x, y) + pack_item(item))
+    return b"".join(parts)
+
+
+def read_chests(reader: Reader) -> dict:
+    chests = {}
+    for _ in range(reader.count()):
+        position = reader.unpack(POINT)
+        chests[position] = read_item(reader)
+    return chests
+
+
+def pack_monsters(monsters: Monsters, next_uid: int) -> bytes:
+    monsters.compact()
+    parts = [COUNT.pack(len(monsters)) + COUNT.pack(next_uid)]
+    for column in MONSTER_COLUMNS:
+        parts.append(getattr(monsters, column).tobytes())
+    return b"".join(parts)
+
+
+def read_monsters(reader: Reader, occupancy: OccupancyGrid) -> tuple:
+    """Potwory (dodane też do occupancy, która odtąd wskazuje na ich tablicę) i następny uid"""
+    count, next_uid = reader.count(), reader.count()
+    monsters = Monsters()
+    monsters.extend([reader.array("i", count) for _ in MONSTER_COLUMNS])
+    occupancy.table = monsters
+    for monster in monsters:
+        occupancy.add(monster)
+    return monsters, next_uid
+
+
+def pack_runs(cells) -> bytes:
+    """Kodowanie długości serii: liczba serii, wartości (uint8) i długości serii pomniejszone o 1 (uint32)"""
+    cells = bytes(cells)
+    if not cells:
+        return COUNT.pack(0)
+    # Granice serii bez pętli w Pythonie: XOR bufora z przesuniętym o bajt daje niezero tam, gdzie
+    # następny bajt jest inny; odcinki między granicami to serie, bajty za granicami - ich wartości
+    changes = int.from_bytes(cells[:-1], "little") ^ int.from_bytes(cells[1:], "little")
+    boundaries = changes.to_bytes(len(cells) - 1, "little").translate(NONZERO)
+    values = cells[:1] + bytes(compress(cells[1:], boundaries))
+    lengths = array("I", map(len, boundaries.split(b"\x01")))
+    return COUNT.pack(len(values)) + values + lengths.tobytes()
+
+
+def read_runs(reader: Reader) -> bytearray:
+    count = reader.count()
+    values = reader.bytes(count)
+    lengths = reader.array("I", count)
+    return bytearray(b"".join([SINGLE_BYTES[value] * (length + 1) for value, length in zip(values, lengths)]))
+
+
+def pack_level(state: dict, tile_runs: bytes | None = None) -> bytes:
+    """Poziom z magazynu (GameCore.store_level) w zwartej postaci: kafelki i odkryte pola jako serie.
+
+    The map never changes once generated, so tile_runs - pack_runs of the
+    tiles kept from an earlier pack_level or unpack_level - spare encoding it again.
+    """
+    tiles = state["map"]
+    return b"".join(
+        (
+            LEVEL.pack(tiles.width, tiles.height),
+            pack_rng(state["level_rng"]),
+            pack_point(state["stairs_down"]),
+            pack_point(state["stairs_up"]),
+            pack_chests(state["chests"]),
+            pack_monsters(state["monsters"], state["next_uid"]),
+            tile_runs or pack_runs(tiles.tiles),
+            pack_runs(state["fov"].explored),
+        )
+    )
+
+
+def unpack_level(data) -> dict:
+    """Stan poziomu z rekordu pack_level, gotowy dla GameCore.restore_level; zakodowane kafelki pod tile_runs"""
+    reader = Reader(data)
+    width, height = reader.unpack(LEVEL)
+    state: dict = {"level_rng": read_rng(reader), "stairs_down": read_point(reader), "stairs_up": read_point(reader)}
+    state["chests"] = read_chests(reader)
+    state["occupancy"] = OccupancyGrid(width, height)
+    state["monsters"], state["next_uid"] = read_monsters(reader, state["occupancy"])
+    start = reader.position
+    state["map"] = TileMap.from_buffer(width, height, read_runs(reader))
+    state["tile_runs"] = bytes(data[start : reader.position])
+    state["fov"] = FieldOfView(state["map"])
+    state["fov"].explored[:] = read_runs(reader)
+    state["flow"] = FlowField(state["map"])
+    state["free_cells"] = None
+    return state
+
+
+def dumps(game: GameCore) -> bytes:
+    """Stan gry jako bajty; kafelki mapy na końcu (od granicy strony dla dużych map)"""
+    parts = [
+        GAME.pack(game.seed, game.width, game.height, game.max_monsters, game.level, game.steps, game.dead, game.won),
+        pack_string(game.generator_name),
+    ]
+    streams = game.rng
+    parts += [pack_rng(stream) for stream in (streams.player, streams.loot, streams.combat, streams.ai, game.level_rng)]
+
+    player = game.player
+    parts.append(
+        PLAYER.pack(
+            player.x, player.y, player.hp, player.max_hp, player.attack, player.defense, player.exp, player.level
+        )
+    )
+    parts.append(COUNT.pack(len(player.inventory)))
+    parts += [pack_item(item) for item in player.inventory]
+
+    parts.append(pack_chests(game.chests))
+    parts.append(POINT.pack(*game.stairs_down))
+    parts.append(pack_point(game.stairs_up))
+    parts.append(pack_monsters(game.monsters, game.next_uid))
+    parts.append(bytes(game.fov.explored))
+
+    # Pozostałe poziomy trwałego lochu jako rekordy pack_level
+    records = list(game.levels.records()) if game.levels is not None else []
+    parts.append(COUNT.pack(len(records)))
+    for level, record in records:
+        parts.append(COUNT.pack(level) + COUNT.pack(len(record)) + record)
+
+    body = b"".join(parts)
+    tiles_offset = PREAMBLE.size + len(body)
+    if len(game.map.tiles) >= MMAP_MIN_CELLS:
+        tiles_offset = -(-tiles_offset // mmap.ALLOCATIONGRANULARITY) * mmap.ALLOCATIONGRANULARITY
+    padding = bytes(tiles_offset - PREAMBLE.size - len(body))
+    return PREAMBLE.pack(MAGIC, VERSION, tiles_offset) + body + padding + bytes(game.map.tiles)
+
+
+def loads(data, game_class=GameCore, tiles=None, **options) -> GameCore:
+    """Odtwórz grę z bajtów zapisu; tiles - gotowy bufor kafelków (np. mmap) zamiast kopii z data.
+
+    Extra keyword options go to game_class (e.g. levels=LevelStore() for a
+    persistent dungeon; without a store, saved levels other than the current
+    one are dropped).
+    """
+    reader = Reader(data)
+    magic, version, tiles_offset = reader.unpack(PREAMBLE)
+    if magic != MAGIC:
+        raise ValueError("Not a save file")
+    if version not in (1, VERSION):
+        raise ValueError(f"Unsupported save file version: {version}")
+    seed, width, height, max_monsters, level, steps, dead, won = reader.unpack(GAME)
+    generator = reader.string()
+
+    game = game_class(
+        width=width, height=height, max_monsters=max_monsters, generator=generator, seed=seed, generate=False, **options
+    )
+    game.level, game.steps, game.dead, game.won = level, steps, bool(dead), bool(won)
+    game.rng.player, game.rng.loot, game.rng.combat, game.rng.ai = (read_rng(reader) for _ in range(4))
+    game.level_rng = read_rng(reader)
+
+    if tiles is None:
+        tiles = bytearray(data[tiles_offset : tiles_offset + width * height])
+    game.map = TileMap.from_buffer(width, height, tiles)
+
+    player = Player.__new__(Player)
+    player.sprite, player.name = "player", "Rycerz"
+    player.x, player.y, player.hp, player.max_hp, player.attack, player.defense, player.exp, player.level = (
+        reader.unpack(PLAYER)
+    )
+    player.inventory = Inventory()
+    player.equipped = player.inventory.equipped
+    for _ in range(reader.count()):
+        item = read_item(reader)
+        equipped, item.equipped = item.equipped, False
+        player.inventory.add(item)
+        if equipped:
+            player.inventory.equip(item)
+    game.player = player
+
+    game.chests = read_chests(reader)
+    game.stairs_down = reader.unpack(POINT)
+    game.stairs_up = read_point(reader) if version >= 2 else None
+    game.occupancy = OccupancyGrid(width, height)
+    game.monsters, game.next_uid = read_monsters(reader, game.occupancy)
+    game.occupancy.add(player)
+
+    game.flow = FlowField(game.map)
+    game.fov = FieldOfView(game.map)
+    game.fov.explored[:] = reader.bytes(width * height)
+    game.free_cells = None
+    if version >= 2:
+        for _ in range(reader.count()):
+            level, size = reader.count(), reader.count()
+            record = reader.bytes(size)
+            if game.levels is not None:
+                game.levels.put_packed(level, record)
+    game.enter_level()
+    game.prefetch_next_level()
+    return game
+
+
+def save_game(game: GameCore, path: str) -> None:
+    with open(path, "wb") as file:
+        file.write(dumps(game))
+
+
+def load_game(path: str, game_class=GameCore, **options) -> GameCore:
+    """Wczytaj zapis; kafelki dużych map są mapowane z pliku (copy-on-write), nie kopiowane"""
+    with open(path, "rb") as file:
+        _, _, tiles_offset = PREAMBLE.unpack(file.read(PREAMBLE.size))
+        file.seek(0)
+        if tiles_offset % mmap.ALLOCATIONGRANULARITY:
+            return loads(file.read(), game_class, **options)
+        data = file.read(tiles_offset)
+        tiles = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY, offset=tiles_offset)
+        return loads(data, game_class, tiles=tiles, **options)
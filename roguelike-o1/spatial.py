@@ -0,0 +1,138 @@
+"""Indeks zajętości pól mapy (pole -> postać) zamiast liniowego przeszukiwania potworów"""
+
+from array import array
+
+from ecs import Handle
+
+EMPTY = -1  # Kod pustego pola
+# Przesunięcia sąsiednich pól (łącznie ze środkiem) w kolejności wierszami
+NEIGHBOUR_OFFSETS = [(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)]
+
+
+class OccupancyGrid:
+    """Grid-backed cell -> entity index, kept up to date as entities spawn, move and die.
+
+    Cells are a packed array of codes. Entities of table (an
+    ecs.ComponentArrays, e.g. the level's monsters) are stored by their id,
+    so the grid holds no object per monster; any other entity (the player)
+    gets a negative code below EMPTY. Lookups return entities - for the
+    table, handles made on the spot.
+    """
+
+    def __init__(self, width: int, height: int, table=None):
+        self.width = width
+        self.height = height
+        self.cells = array("i", [EMPTY]) * (width * height)
+        self.table = table
+        self.others: dict[int, object] = {}  # kod -> postać spoza table
+
+    def entity(self, code: int):
+        """Postać o podanym kodzie pola"""
+        return self.table.entity(code) if code >= 0 else self.others[code]
+
+    def code(self, entity) -> int:
+        """Kod postaci: id w table albo kod nadany przy add(); EMPTY, jeśli jej nie ma w indeksie"""
+        if isinstance(entity, Handle) and entity.table is self.table:
+            return entity.id
+        for code, other in self.others.items():
+            if other is entity:
+                return code
+        return EMPTY
+
+    def get(self, x: int, y: int):
+        """Postać stojąca na polu albo None"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            code = self.cells[y * self.width + x]
+            if code != EMPTY:
+                return self.entity(code)
+        return None
+
+    def is_occupied(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height and self.cells[y * self.width + x] != EMPTY
+
+    def add(self, entity) -> None:
+        index = entity.y * self.width + entity.x
+        if self.cells[index] != EMPTY:
+            raise ValueError(f"Cell ({entity.x}, {entity.y}) is already occupied")
+        code = self.code(entity)
+        if code == EMPTY:
+            code = min(self.others, default=EMPTY) - 1
+            self.others[code] = entity
+        self.cells[index] = code
+
+    def add_ids(self, ids, xs, ys) -> None:
+        """Wpisz naraz encje table o podanych id na pola (xs[i], ys[i]) - bez tworzenia uchwytów"""
+        cells, width = self.cells, self.width
+        for id, x, y in zip(ids, xs, ys):
+            index = y * width + x
+            if cells[index] != EMPTY:
+                raise ValueError(f"Cell ({x}, {y}) is already occupied")
+            cells[index] = id
+
+    def remove(self, entity) -> None:
+        index = entity.y * self.width + entity.x
+        code = self.code(entity)
+        if code != EMPTY and self.cells[index] == code:
+            self.cells[index] = EMPTY
+        self.others.pop(code, None)
+
+    def move(self, entity, x: int, y: int) -> None:
+        """Przesuń postać na nowe pole, aktualizując indeks"""
+        self.remove(entity)
+        entity.x = x
+        entity.y = y
+        self.add(entity)
+
+    def neighbours(self, x: int, y: int) -> list:
+        """Postacie na polach w odległości <= 1 (w tym na samym polu), wierszami"""
+        return self.window(x - 1, y - 1, 3, 3)
+
+    def window(self, x: int, y: int, width: int, height: int) -> list:
+        """Postacie w prostokącie (x, y, width, height), przycięte do mapy"""
+        cells, entity = self.cells, self.entity
+        left, right = max(x, 0), min(x + width, self.width)
+        found = []
+        for row in range(max(y, 0), min(y + height, self.height)):
+            start = row * self.width
+            for code in cells[start + left : start + right]:
+                if code != EMPTY:
+                    found.append(entity(code))
+        return found
+
+    def table_ids(self, x: int, y: int, width: int, height: int) -> list:
+        """Id encji z table w prostokącie (x, y, width, height), przycięte do mapy, wierszami; bez tworzenia uchwytów"""
+        cells = self.cells
+        left, right = max(x, 0), min(x + width, self.width)
+        found = []
+        for row in range(max(y, 0), min(y + height, self.height)):
+            start = row * self.width
+            for code in cells[start + left : start + right]:
+                if code >= 0:
+                    found.append(code)
+        return found
+
+    def neighbour_ids(self, x: int, y: int) -> list:
+        """Id encji z table na polach w odległości <= 1 (w tym na samym polu), wierszami"""
+        width = self.width
+        if not (0 < x < width - 1 and 0 < y < self.height - 1):
+            return self.table_ids(x - 1, y - 1, 3, 3)
+        # Pole z dala od brzegu: trzy wycinki po trzy pola, bez przycinania
+        cells, found = self.cells, []
+        for start in ((y - 1) * width + x - 1, y * width + x - 1, (y + 1) * width + x - 1):
+            for code in cells[start : start + 3]:
+                if code >= 0:
+                    found.append(code)
+        return found
+
+    def copy(self, table, others: list) -> "OccupancyGrid":
+        """Kopia indeksu dla kopii postaci: table zamiast tablicy encji, others (klony) na swoich polach.
+
+        Every entity outside the table must be in others, otherwise the copy
+        would still point at the original objects.
+        """
+        grid = OccupancyGrid.__new__(OccupancyGrid)
+        grid.width, grid.height = self.width, self.height
+        grid.cells = self.cells[:]
+        grid.table = table
+        grid.others = {grid.cells[entity.y * self.width + entity.x]: entity for entity in others}
+        return grid
@@ -0,0 +1,111 @@
+"""Tabele potworów i łupów wczytywane z TOML i kompilowane do samplerów metodą aliasów"""
+
+import os
+import random
+from array import array
+
+import toml
+
+TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables.toml")
+POTION = 0  # Indeks mikstury w tabeli łupów
+
+
+class AliasSampler:
+    """Walker/Vose alias table: O(1) draws from a fixed discrete distribution"""
+
+    def __init__(self, weights: list):
+        count = len(weights)
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError("At least one weight must be positive")
+        scaled = [weight * count / total for weight in weights]
+        self.prob = [1.0] * count
+        self.alias = list(range(count))
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+
+    def sample(self, rng=random) -> int:
+        return self.sample_many(1, rng)[0]
+
+    def sample_many(self, count: int, rng=random) -> list:
+        """count losowań, po jednej liczbie losowej na wynik: część całkowita to kolumna, ułamek - próg aliasu"""
+        columns, prob, alias, draw = len(self.prob), self.prob, self.alias, rng.random
+        result = []
+        for _ in range(count):
+            value = draw() * columns
+            column = int(value)
+            result.append(column if value - column < prob[column] else alias[column])
+        return result
+
+
+def level_weight(entry: dict, level: int) -> float:
+    """Waga wpisu na danym poziomie lochu (opis reguł w tables.toml)"""
+    weight = entry.get("weight", 0.0) + entry.get("weight_per_level", 0.0) * level
+    for rule in entry.get("rules", []):
+        if level >= rule.get("min_level", 0) and level % rule.get("every", 1) == 0:
+            weight = rule["weight"]
+    return weight
+
+
+def compile_samplers(entries: list, max_level: int) -> list:
+    """Sampler dla każdego poziomu 0..max_level"""
+    return [AliasSampler([level_weight(entry, level) for entry in entries]) for level in range(max_level + 1)]
+
+
+class MonsterTable:
+    """Monster archetypes as per-kind arrays; a monster's kind is an index into them"""
+
+    def __init__(self, entries: list, max_level: int):
+        self.names = tuple(entry["name"] for entry in entries)
+        self.sprites = tuple(entry["sprite"] for entry in entries)
+        self.hp_min = array("H", [entry["hp"][0] for entry in entries])
+        self.hp_max = array("H", [entry["hp"][1] for entry in entries])
+        self.attack = array("H", [entry["attack"] for entry in entries])
+        self.defense = array("H", [entry["defense"] for entry in entries])
+        self.exp = array("H", [entry["exp"] for entry in entries])
+        self.speed = array("B", [entry["speed"] for entry in entries])
+        self.samplers = compile_samplers(entries, max_level)
+
+    def sampler(self, level: int) -> AliasSampler:
+        return self.samplers[min(level, len(self.samplers) - 1)]
+
+
+class LootTable:
+    """Item categories (potion first) with per-level samplers and stat roll parameters"""
+
+    def __init__(self, potion: dict, equipment: dict, max_level: int):
+        entries = [potion, *equipment["items"]]
+        self.categories = ("potion", *(entry["category"] for entry in equipment["items"]))
+        self.primary = (None, *(entry["primary"] for entry in equipment["items"]))
+        self.potion_name = potion["name"]
+        self.healing = potion["healing"]
+        self.healing_per_level = potion["healing_per_level"]
+        self.bonus_min, self.bonus_max = equipment["bonus"]
+        self.bonus_cap = equipment["bonus_cap"]
+        self.exp_divisor = equipment["exp_divisor"]
+        self.samplers = compile_samplers(entries, max_level)
+
+    def sampler(self, level: int) -> AliasSampler:
+        return self.samplers[min(level, len(self.samplers) - 1)]
+
+
+class Tables:
+    """Wszystkie tabele balansu gry"""
+
+    def __init__(self, data: dict):
+        self.max_level = data["max_level"]
+        self.monsters = MonsterTable(data["monsters"], self.max_level)
+        self.loot = LootTable(data["potion"], data["equipment"], self.max_level)
+
+
+def load_tables(path: str = TABLES_PATH) -> Tables:
+    return Tables(toml.load(path))
+
+
+TABLES = load_tables()
@@ -0,0 +1,88 @@
+"""Zwarta mapa kafelków: jeden bajt (identyfikator kafelka) na pole"""
+
+import random
+from enum import IntEnum
+from itertools import compress
+
+
+class Tile(IntEnum):
+    """Identyfikatory kafelków zapisywane w TileMap.tiles"""
+
+    FLOOR = 0
+    WALL = 1
+
+
+TILE_CHARS = {Tile.FLOOR: ".", Tile.WALL: "#"}
+
+# Tablice dla bytes.translate: 1 dla danego kafelka, 0 dla pozostałych
+MASK_TABLES = {tile: bytes(1 if value == tile else 0 for value in range(256)) for tile in Tile}
+
+
+class TileMap:
+    """Row-major bytearray of uint8 tile IDs"""
+
+    def __init__(self, width: int, height: int, fill: Tile = Tile.FLOOR):
+        self.width = width
+        self.height = height
+        self.tiles = bytearray([fill]) * (width * height)
+
+    @classmethod
+    def from_buffer(cls, width: int, height: int, tiles) -> "TileMap":
+        """Mapa na gotowym buforze kafelków (bytearray albo mmap), bez kopiowania"""
+        tile_map = cls.__new__(cls)
+        tile_map.width = width
+        tile_map.height = height
+        tile_map.tiles = tiles
+        return tile_map
+
+    def get(self, x: int, y: int) -> int:
+        return self.tiles[y * self.width + x]
+
+    def set(self, x: int, y: int, tile: Tile) -> None:
+        self.tiles[y * self.width + x] = tile
+
+    def is_wall(self, x: int, y: int) -> bool:
+        return self.tiles[y * self.width + x] == Tile.WALL
+
+    def row(self, y: int) -> bytearray:
+        return self.tiles[y * self.width : (y + 1) * self.width]
+
+    def fill_border(self, tile: Tile) -> None:
+        """Otocz mapę kafelkami jednym przypisaniem na każdy brzeg"""
+        width, height = self.width, self.height
+        self.tiles[:width] = bytes([tile]) * width
+        self.tiles[(height - 1) * width :] = bytes([tile]) * width
+        self.tiles[::width] = bytes([tile]) * height
+        self.tiles[width - 1 :: width] = bytes([tile]) * height
+
+    def cells_of(self, tile: Tile) -> list:
+        """Indeksy wszystkich pól danego typu"""
+        # mmap nie ma translate, więc mapa wczytana z pliku jest tu raz kopiowana
+        tiles = self.tiles if isinstance(self.tiles, bytearray) else bytes(self.tiles)
+        mask = tiles.translate(MASK_TABLES[tile])
+        return list(compress(range(len(self.tiles)), mask))
+
+    def __str__(self):
+        return "\n".join("".join(TILE_CHARS[tile] for tile in self.row(y)) for y in range(self.height))
+
+
+class CellSampler:
+    """Random cells drawn without replacement from a precomputed list (swap-and-pop)"""
+
+    def __init__(self, cells: list, width: int, rng=random):
+        self.cells = cells
+        self.width = width
+        self.rng = rng
+
+    def __len__(self):
+        return len(self.cells)
+
+    def sample(self) -> tuple:
+        """Losowe wolne pole (x, y), usuwane z puli"""
+        if not self.cells:
+            raise ValueError("No free cells left")
+        index = self.rng.randrange(len(self.cells))
+        cell = self.cells[index]
+        self.cells[index] = self.cells[-1]
+        self.cells.pop()
+        return cell % self.width, cell // self.width
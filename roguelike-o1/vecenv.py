@@ -0,0 +1,203 @@
+"""Środowisko w stylu Gym: K gier bez okna krokowanych razem, obserwacje w stałych buforach"""
+
+import random
+from array import array
+
+from engine import DEFAULT_GENERATOR, MAP_HEIGHT, MAP_WIDTH, MAX_MONSTERS, Action, GameCore
+from tables import TABLES
+
+# Akcje: 0..5 to Action (jak klawisze w Game.handle_input), dalej "U" i "D" z ekranu ekwipunku
+INVENTORY_SLOTS = 16  # Widoczne w obserwacji (najlepsze) przedmioty ekwipunku
+USE_ITEM = len(Action)  # USE_ITEM + i: użyj/załóż/zdejmij przedmiot i
+DROP_ITEM = USE_ITEM + INVENTORY_SLOTS  # DROP_ITEM + i: wyrzuć przedmiot i
+NUM_ACTIONS = DROP_ITEM + INVENTORY_SLOTS
+
+# Kanały siatki obserwacji; kanały od MONSTER do końca są czyszczone co krok jednym przypisaniem
+TILES, EXPLORED, MONSTER, CHEST, STAIRS, PLAYER = range(6)
+CHANNELS = 6
+STATS = ("x", "y", "hp", "max_hp", "attack", "defense", "exp", "level", "stage", "inventory")
+ITEM_FIELDS = ("category", "attack", "defense", "healing", "equipped")
+CATEGORY_IDS = {category: index + 1 for index, category in enumerate(TABLES.loot.categories)}  # 0 - pusty slot
+
+STAGE_REWARD = 100  # Nagroda za zejście poziom niżej
+DEATH_REWARD = -100
+
+
+class VectorEnv:
+    """K headless games stepped in lockstep, observations written into buffers allocated once.
+
+    Buffers are flat and C-ordered; their shapes are in the *_shape
+    attributes, so e.g. numpy.frombuffer(env.grid, numpy.uint8).reshape(env.grid_shape)
+    gives an array view that every step() updates in place:
+
+    - grid: uint8 (K, CHANNELS, height, width) - tile IDs, explored mask, visible
+      monsters (kind + 1), chests and stairs (1 down, 2 up) the player has seen, the player,
+    - stats: int32 (K, len(STATS)) - player stats with equipment, stage, inventory size,
+    - items: int32 (K, INVENTORY_SLOTS, len(ITEM_FIELDS)) - best items first, category 0 = empty,
+    - rewards: float64 (K,), terminated / truncated: uint8 (K,).
+
+    Inventory actions are free, like in the game's inventory screen: they do
+    not advance the turn, but count towards the max_steps truncation. A
+    finished game is reset right away, so after a terminated or truncated
+    step the observation is already the first one of the next episode; the
+    return and length of the finished episode are in episode_returns and
+    episode_lengths.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        width: int = MAP_WIDTH,
+        height: int = MAP_HEIGHT,
+        max_monsters: int = MAX_MONSTERS,
+        generator: str = DEFAULT_GENERATOR,
+        max_steps: int = 5000,
+        game_class=GameCore,
+    ):
+        self.count = count
+        self.width = width
+        self.height = height
+        self.cells = width * height
+        self.game_options = {"width": width, "height": height, "max_monsters": max_monsters, "generator": generator}
+        self.max_steps = max_steps
+        self.game_class = game_class
+        self.games: list[GameCore | None] = [None] * count
+        self.seeds = [0] * count  # Ziarno następnego epizodu każdej gry
+
+        self.grid_shape = (count, CHANNELS, height, width)
+        self.stats_shape = (count, len(STATS))
+        self.items_shape = (count, INVENTORY_SLOTS, len(ITEM_FIELDS))
+        self.grid = bytearray(count * CHANNELS * self.cells)
+        self.stats = array("i", bytes(count * len(STATS) * 4))
+        self.items = array("i", bytes(count * INVENTORY_SLOTS * len(ITEM_FIELDS) * 4))
+        self.rewards = array("d", bytes(count * 8))
+        self.terminated = bytearray(count)
+        self.truncated = bytearray(count)
+        self.episode_returns = array("d", bytes(count * 8))
+        self.episode_lengths = array("I", bytes(count * 4))
+
+        self.view = memoryview(self.grid)
+        self.blank = bytes((CHANNELS - MONSTER) * self.cells)
+        self.blank_items = array("i", bytes(INVENTORY_SLOTS * len(ITEM_FIELDS) * 4))
+        self.levels = [0] * count  # Poziom, którego kafelki są teraz w siatce
+        self.returns = array("d", bytes(count * 8))
+        self.lengths = array("I", bytes(count * 4))
+        self.exp = [0] * count
+
+    def reset(self, seed: int | None = None) -> None:
+        """Nowe epizody we wszystkich grach; gra k dostaje ziarno seed + k, kolejne epizody seed + k + K, ..."""
+        if seed is None:
+            seed = random.getrandbits(32)
+        for index in range(self.count):
+            self.seeds[index] = seed + index
+            self.reset_game(index)
+
+    def reset_game(self, index: int) -> None:
+        previous = self.games[index]
+        if previous is not None:
+            previous.close()
+        game = self.game_class(seed=self.seeds[index], **self.game_options)
+        self.seeds[index] += self.count
+        self.games[index] = game
+        self.levels[index] = 0
+        self.returns[index] = 0.0
+        self.lengths[index] = 0
+        self.exp[index] = 0
+        self.observe(index)
+
+    def close(self) -> None:
+        """Zamknij wszystkie gry (ich wątki budujące poziomy w tle)"""
+        for game in self.games:
+            if game is not None:
+                game.close()
+
+    def step(self, actions) -> None:
+        """Wykonaj akcję (int z zakresu NUM_ACTIONS) w każdej grze i zapisz wyniki w buforach"""
+        if self.games and self.games[0] is None:
+            raise RuntimeError("VectorEnv.step() called before reset()")
+        for index, action in enumerate(actions):
+            game = self.games[index]
+            assert game is not None
+            level = game.level
+            if action < USE_ITEM:
+                game.step(Action(action))
+            else:
+                slot = action - USE_ITEM if action < DROP_ITEM else action - DROP_ITEM
+                inventory = game.player.inventory
+                if slot < len(inventory):
+                    if action < DROP_ITEM:
+                        game.use_item(inventory[slot])
+                    else:
+                        game.drop_item(inventory[slot])
+
+            reward = game.player.exp - self.exp[index] + STAGE_REWARD * (game.level - level)
+            if game.dead:
+                reward += DEATH_REWARD
+            self.exp[index] = game.player.exp
+            self.rewards[index] = reward
+            self.returns[index] += reward
+            self.lengths[index] += 1
+            self.terminated[index] = game.done
+            self.truncated[index] = not game.done and self.lengths[index] >= self.max_steps
+            if self.terminated[index] or self.truncated[index]:
+                self.episode_returns[index] = self.returns[index]
+                self.episode_lengths[index] = self.lengths[index]
+                self.reset_game(index)
+            else:
+                self.observe(index)
+
+    def observe(self, index: int) -> None:
+        """Zapisz obserwację gry index w buforach (bez tworzenia nowych)"""
+        game, width, cells, grid, view = self.games[index], self.width, self.cells, self.grid, self.view
+        assert game is not None
+        base = index * CHANNELS * cells
+        player = game.player
+        game.fov.update(player.x, player.y)
+        if self.levels[index] != game.level:
+            self.levels[index] = game.level
+            view[base + TILES * cells : base + (TILES + 1) * cells] = game.map.tiles
+        explored, visible = game.fov.explored, game.fov.visible
+        view[base + EXPLORED * cells : base + (EXPLORED + 1) * cells] = explored
+        view[base + MONSTER * cells : base + CHANNELS * cells] = self.blank
+
+        offset = base + MONSTER * cells
+        monsters = game.monsters
+        for x, y, kind in zip(monsters.x, monsters.y, monsters.kind):
+            cell = y * width + x
+            if cell in visible:
+                grid[offset + cell] = kind + 1
+        offset = base + CHEST * cells
+        for x, y in game.chests:
+            if explored[y * width + x]:
+                grid[offset + y * width + x] = 1
+        for value, stairs in ((1, game.stairs_down), (2, game.stairs_up)):
+            if stairs is not None and explored[stairs[1] * width + stairs[0]]:
+                grid[base + STAIRS * cells + stairs[1] * width + stairs[0]] = value
+        grid[base + PLAYER * cells + player.y * width + player.x] = 1
+
+        stats = self.stats
+        offset = index * len(STATS)
+        inventory = player.inventory
+        stats[offset] = player.x
+        stats[offset + 1] = player.y
+        stats[offset + 2] = player.hp
+        stats[offset + 3] = player.max_hp
+        stats[offset + 4] = player.total_attack()
+        stats[offset + 5] = player.total_defense()
+        stats[offset + 6] = player.exp
+        stats[offset + 7] = player.level
+        stats[offset + 8] = game.level
+        stats[offset + 9] = len(inventory)
+
+        items = self.items
+        size = INVENTORY_SLOTS * len(ITEM_FIELDS)
+        offset = index * size
+        items[offset : offset + size] = self.blank_items
+        for slot in range(min(len(inventory), INVENTORY_SLOTS)):
+            item = inventory[slot]
+            items[offset] = CATEGORY_IDS[item.category]
+            items[offset + 1] = item.attack
+            items[offset + 2] = item.defense
+            items[offset + 3] = item.healing
+            items[offset + 4] = item.equipped
+            offset += len(ITEM_FIELDS)
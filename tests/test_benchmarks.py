@@ -0,0 +1,13 @@
+import json
+
+import benchmarks
+
+
+def test_suite_has_no_regressions():
+    with open(benchmarks.BASELINE_PATH) as file:
+        baseline = json.load(file)["results"]
+    results = benchmarks.run_suite(list(benchmarks.SUITE), benchmarks.SUITE_REPEATS, seed=0)
+    factor = benchmarks.machine_factor(results, baseline)
+    comparison = benchmarks.compare_baseline(results, baseline, benchmarks.suite_tolerances(results), factor)
+    regressions = {name: round(ratio, 2) for name, (_, ratio, ok) in comparison.items() if not ok}
+    assert not regressions, f"slower than the baseline (machine factor {factor:.2f}): {regressions}"
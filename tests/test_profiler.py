@@ -0,0 +1,25 @@
+from engine import Action, GameCore
+from profiler import GAME_PHASES, Profiler
+
+
+def test_snapshot_of_profiled_game_steps_the_copy():
+    profiler = Profiler()
+    game = profiler.instrument(GameCore(seed=1), GAME_PHASES)
+    state = game.state()
+    copy = game.snapshot()
+    for _ in range(10):
+        copy.step(Action.RIGHT)
+    assert game.state() == state
+    assert copy.steps == 10 and game.steps == 0
+    assert profiler.phases["step"].count == 10
+
+
+def test_instrument_leaves_class_and_other_instances_alone():
+    profiler = Profiler()
+    game = profiler.instrument(GameCore(seed=1), GAME_PHASES)
+    other = GameCore(seed=1)
+    other.step(Action.WAIT)
+    assert type(other) is GameCore and isinstance(game, GameCore)
+    assert "step" not in profiler.phases
+    game.step(Action.WAIT)
+    assert profiler.phases["step"].count == 1